@@ -2,16 +2,21 @@ import pandas as pd
 
 def diagnose_missing():
     try:
-        df = pd.read_csv("Meteorite_Landings_Final.csv")
+        # Read-only diagnostic: only parse the columns we actually report on
+        df = pd.read_csv("Meteorite_Landings_Final.csv",
+                         usecols=['name', 'id', 'year_int', 'mass (g)'],
+                         dtype={'name': 'string', 'id': 'float64',
+                                'year_int': 'int32', 'mass (g)': 'float32'})
     except:
         print("❌ File not found.")
         return
 
-    # Filter for missing IDs
+    # Filter for missing IDs — single scan of the id column
     if 'id' not in df.columns: df['id'] = 0
-    missing = df[(df['id'] == 0) | (df['id'].isna())]
-    
-    print(f"🔍 Total Missing IDs: {len(missing)}")
+    missing_np = pd.to_numeric(df['id'], errors='coerce').fillna(0).to_numpy() == 0
+    missing = df[missing_np]
+
+    print(f"🔍 Total Missing IDs: {int(missing_np.sum())}")
     
     if len(missing) > 0:
         print("\n--- SAMPLE OF MISSING ENTRIES ---")
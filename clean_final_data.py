@@ -1,35 +1,39 @@
 import pandas as pd
 import numpy as np
 
+# Tokens the Bulletin uses to mean an observed fall
+FELL_TOKENS = {'yc', 'yp', 'y', 'yes', 'fell'}
+
 def clean_and_finalize():
     input_file = "Meteorite_Landings_Updated.csv"
     output_file = "Meteorite_Landings_Ready.csv"
 
     print(f"🧹 Loading {input_file}...")
     try:
-        # Read CSV (treat string 'NULL' as actual NaN)
-        df = pd.read_csv(input_file, na_values=['NULL', 'null', ''])
+        # Read CSV in chunks (treat string 'NULL' as actual NaN) and drop
+        # ghost rows per chunk so they never accumulate in memory.
+        chunks = []
+        raw_rows = 0
+        for chunk in pd.read_csv(input_file, na_values=['NULL', 'null', ''], chunksize=100_000):
+            raw_rows += chunk.shape[0]
+            # 1. REMOVE GHOST ROWS (rows where Name is missing)
+            chunks.append(chunk.dropna(subset=['name']))
+        df = pd.concat(chunks, ignore_index=True, copy=False)
     except FileNotFoundError:
         print("❌ File not found. Run the update script first.")
         return
 
-    print(f"   Raw Shape: {df.shape}")
-
-    # 1. REMOVE GHOST ROWS
-    # Drop rows where Name is missing
-    df = df.dropna(subset=['name'])
+    print(f"   Raw Rows: {raw_rows} -> {len(df)} after ghost-row drop")
 
     # 2. FIX 'FALL' COLUMN
     # Logic: 'Y', 'Yc', 'Yes', 'Fell' -> 'Fell'
     #        Everything else (N, Found, Blank) -> 'Found'
-    def clean_fall(val):
-        s = str(val).lower().strip()
-        if s in ['yc', 'yp', 'y', 'yes', 'fell']:
-            return 'Fell'
-        else:
-            return 'Found'
-
-    df['fall'] = df['fall'].apply(clean_fall)
+    # Vectorized: hashed set membership in C instead of a Python call per row.
+    # Arrow-backed strings keep the column in one contiguous buffer (rather
+    # than a PyObject* per cell), so lower/strip/isin stay cache-friendly.
+    # Stored as Categorical (2 distinct values) to shrink the column ~10x.
+    s = df['fall'].astype('string[pyarrow]').str.lower().str.strip()
+    df['fall'] = pd.Categorical(np.where(s.isin(FELL_TOKENS), 'Fell', 'Found'))
     print("   ✅ Fixed 'Fall' status (Yc -> Fell)")
 
     # 3. SELECT ONLY USEFUL COLUMNS
@@ -44,6 +48,12 @@ def clean_and_finalize():
     cols_to_keep = [c for c in desired_cols if c in df.columns]
     df = df[cols_to_keep]
 
+    # Low-cardinality strings -> category: int8 codes + a small dictionary
+    # instead of a Python string object per cell ('fall' is handled above)
+    for c in ['recclass', 'category_broad']:
+        if c in df.columns:
+            df[c] = df[c].astype('category')
+
     # 4. HANDLE COORDINATES
     # Force them to be numeric. Errors become NaN.
     df['reclat'] = pd.to_numeric(df['reclat'], errors='coerce')
@@ -53,7 +63,8 @@ def clean_and_finalize():
     # Log Mass check
     df['mass (g)'] = pd.to_numeric(df['mass (g)'], errors='coerce').fillna(0)
     df = df[df['mass (g)'] > 0]
-    df['mass_log'] = np.log10(df['mass (g)'])
+    # Single numpy pass over the raw array (no index alignment, no temp Series)
+    df['mass_log'] = np.log10(df['mass (g)'].to_numpy(dtype=np.float32))
 
     # Year check
     df['year_int'] = pd.to_numeric(df['year_int'], errors='coerce').fillna(0).astype(int)
@@ -61,12 +72,15 @@ def clean_and_finalize():
     df = df[(df['year_int'] >= 860) & (df['year_int'] <= 2026)]
 
     # 6. DEDUPLICATE
-    # Sort so that entries with valid coordinates come FIRST
-    df = df.sort_values(by=['name', 'reclat'], na_position='last')
-    df = df.drop_duplicates(subset=['name'], keep='first')
+    # Stable sort so entries with valid coordinates come FIRST, then take
+    # the head of each name group — a linear pass over the sorted frame
+    # instead of building a separate dedup hash table
+    df = df.sort_values(['name', 'reclat'], na_position='last', kind='mergesort', ignore_index=True)
+    df = df.groupby('name', sort=False, as_index=False).head(1)
 
-    # Save
+    # Save (CSV kept as the archival copy; Parquet is what the app prefers)
     df.to_csv(output_file, index=False)
+    df.to_parquet(output_file.replace('.csv', '.parquet'), compression='zstd', index=False)
     
     print("✨ Cleaning Complete!")
     print(f"   - Final Rows: {len(df)}")
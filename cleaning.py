@@ -21,24 +21,24 @@ def clean_meteorite_data(input_file):
         return None
 
     try:
-        df = pd.read_csv(input_file)
+        # Stream the raw CSV in chunks and filter each chunk as it arrives,
+        # so rows destined to be dropped never sit in memory all at once.
+        chunks = []
+        raw_count = 0
+        for chunk in pd.read_csv(input_file, chunksize=200_000):
+            raw_count += chunk.shape[0]
+            # 1. Drop rows where essential data is missing
+            chunk = chunk.dropna(subset=['reclat', 'reclong', 'mass (g)', 'year'])
+            # 2. Filter out invalid coordinates (0, 0 is a common placeholder)
+            chunk = chunk[(chunk['reclat'] != 0) | (chunk['reclong'] != 0)]
+            chunks.append(chunk)
+        df = pd.concat(chunks, ignore_index=True, copy=False)
     except Exception as e:
         print(f"Error reading CSV file: {e}")
         return None
 
-    print(f"Loaded {df.shape[0]} raw records.")
-    
-    # --- Data Cleaning Steps ---
-    
-    # 1. Drop rows where essential data is missing
-    original_count = df.shape[0]
-    df.dropna(subset=['reclat', 'reclong', 'mass (g)', 'year'], inplace=True)
-    print(f"Dropped {original_count - df.shape[0]} rows with missing essential data.")
-
-    # 2. Filter out invalid coordinates (0, 0 is a common placeholder)
-    original_count = df.shape[0]
-    df = df[(df['reclat'] != 0) | (df['reclong'] != 0)]
-    print(f"Dropped {original_count - df.shape[0]} rows with (0,0) coordinates.")
+    print(f"Loaded {raw_count} raw records.")
+    print(f"Dropped {raw_count - df.shape[0]} rows with missing essential data or (0,0) coordinates.")
 
     # 3. Process and filter years (THE FIX IS HERE)
     
@@ -64,7 +64,10 @@ def clean_meteorite_data(input_file):
     print(f"Dropped {original_count - df.shape[0]} rows with invalid mass values.")
     
     # Create a log-transformed mass *as a new column*
-    df['mass_log'] = np.log10(df['mass (g)'] + 1) # Add 1 to avoid log(0)
+    # log10(x + 1) via log1p: fuses the +1 into the log pass, so no
+    # intermediate Series is allocated for the addition
+    mass = df['mass (g)'].to_numpy(dtype=np.float32)
+    df['mass_log'] = (np.log1p(mass) * np.float32(1.0 / np.log(10))).astype(np.float32)
 
     print(f"Cleaning complete. {df.shape[0]} valid records remaining.")
     return df
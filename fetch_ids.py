@@ -1,12 +1,52 @@
 import pandas as pd
+import numpy as np
 import requests
 import time
 import re
+import threading
 import urllib3
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metbull_cache
+
 # Suppress SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Compiled once at import; bytes-mode so we can match response.content
+# directly and skip the Unicode decode of each ~500-row HTML page.
+ID_PATTERN = re.compile(rb'code=(\d+)[^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(rb'<[^>]+>')
+
+def _fetch_page(session, base_url, page, throttle):
+    """Fetches one result page and returns its {name: id} map."""
+    # Politeness throttle shared by all workers (~2 requests/sec total),
+    # while the actual network waits still overlap across threads.
+    with throttle:
+        time.sleep(0.5)
+
+    params = {
+        'sea': '*',           # Search All
+        'sfor': 'names',
+        'srt': 'year',        # Sort by Year
+        'dir': 'desc',        # Newest first
+        'lrec': '500',
+        'page': str(page)
+    }
+    response = session.get(base_url, params=params, timeout=45, verify=False)
+
+    page_map = {}
+    for code, name_html in ID_PATTERN.findall(response.content):
+        # Clean name: sometimes it has <b> or &nbsp; tags. Most names have
+        # neither, so a bytes `in` check (one memchr-style scan) skips the
+        # regex sub / replace machinery entirely on the common path.
+        if b'<' in name_html:
+            name_html = TAG_RE.sub(b'', name_html)
+        if b'&nbsp;' in name_html:
+            name_html = name_html.replace(b'&nbsp;', b' ')
+        page_map[name_html.strip().decode('utf-8', 'replace')] = int(code)
+    return page_map
+
 def fill_missing_ids():
     input_file = "Meteorite_Landings_Ready.csv"
     output_file = "Meteorite_Landings_Final.csv"
@@ -22,9 +62,9 @@ def fill_missing_ids():
     if 'id' not in df.columns:
         df['id'] = 0
     
-    # Check how many are missing (0 or NaN)
-    missing_mask = (df['id'] == 0) | (df['id'].isna())
-    missing_count = missing_mask.sum()
+    # Check how many are missing (0 or NaN) — one column scan, reused below
+    missing_np = pd.to_numeric(df['id'], errors='coerce').fillna(0).to_numpy() == 0
+    missing_count = int(missing_np.sum())
     print(f"🔍 Found {missing_count} meteorites missing IDs.")
 
     if missing_count == 0:
@@ -40,55 +80,41 @@ def fill_missing_ids():
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
     
-    name_id_map = {}
-    
-    # Scan 25 pages (500 * 25 = 12,500 records)
+    # Warm cache: skip pages scraped within the last 7 days entirely
+    cache = metbull_cache.load_cache()
+    name_id_map = metbull_cache.cached_map(cache)
+    pages = [p for p in range(0, 25) if p not in metbull_cache.fresh_pages(cache)]
+    if len(pages) < 25:
+        print(f"   ♻️ Cache hit: skipping {25 - len(pages)} fresh pages.")
+
+    # Session = keep-alive: TCP + TLS handshakes are reused across all pages
+    session = requests.Session()
+    session.headers.update(headers)
+    throttle = threading.Lock()
+
+    # Scan 25 pages (500 * 25 = 12,500 records) in parallel
     # This covers the last ~12 years of discoveries
-    for page in range(0, 25):
-        print(f"   ... Scanning Page {page}...", end=" ")
-        
-        params = {
-            'sea': '*',           # Search All
-            'sfor': 'names',      
-            'srt': 'year',        # Sort by Year
-            'dir': 'desc',        # Newest first
-            'lrec': '500',        
-            'page': str(page)     
-            # REMOVED: 'pnt': 'Normal table' (This was stripping the links!)
-        }
-        
-        try:
-            response = requests.get(base_url, params=params, headers=headers, timeout=45, verify=False)
-            
-            # REGEX EXPLANATION:
-            # 1. code=(\d+)   -> Capture the ID number
-            # 2. [^>]*>       -> Skip remaining tag attributes
-            # 3. (.*?)        -> Capture the Meteorite Name
-            # 4. </a>         -> Stop at the closing tag
-            # We use re.IGNORECASE just in case
-            pattern = r'code=(\d+)[^>]*>(.*?)</a>'
-            
-            matches = re.findall(pattern, response.text, re.IGNORECASE)
-            
-            if not matches:
-                print("⚠️ No links found (Page might be empty).")
+    page_maps = {}
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = {executor.submit(_fetch_page, session, base_url, page, throttle): page
+                   for page in pages}
+
+        for future in as_completed(futures):
+            page = futures[future]
+            try:
+                page_map = future.result()
+            except Exception as e:
+                print(f"   ❌ Error on page {page}: {e}")
+                continue
+
+            if page_map:
+                print(f"   ✅ Page {page}: indexed {len(page_map)} meteorites.")
+                name_id_map.update(page_map)
+                page_maps[page] = page_map
             else:
-                new_found = 0
-                for code, name_html in matches:
-                    # Clean name: sometimes it has <b> or &nbsp; tags
-                    clean_name = re.sub(r'<[^>]+>', '', name_html) # Remove tags
-                    clean_name = clean_name.replace('&nbsp;', ' ').strip()
-                    
-                    name_id_map[clean_name] = int(code)
-                    new_found += 1
-                
-                print(f"✅ Indexed {new_found} meteorites.")
-            
-            time.sleep(1) # Be polite
-
-        except Exception as e:
-            print(f"❌ Error on page {page}: {e}")
-            break
+                print(f"   ⚠️ Page {page}: no links found (might be empty).")
+
+    metbull_cache.update_cache(cache, page_maps)
 
     print(f"📚 Dictionary built! Contains {len(name_id_map)} Name->ID pairs.")
 
@@ -98,34 +124,24 @@ def fill_missing_ids():
     # Convert map keys to lower case for fuzzy matching safety
     name_id_map_lower = {k.lower(): v for k, v in name_id_map.items()}
 
-    def fill_id(row):
-        # If ID exists, keep it
-        if pd.notna(row['id']) and row['id'] != 0:
-            return row['id']
-        
-        # Look up Name
-        name = str(row['name']).strip()
-        
-        # Try exact match
-        if name in name_id_map:
-            return name_id_map[name]
-        
-        # Try case-insensitive match
-        if name.lower() in name_id_map_lower:
-            return name_id_map_lower[name.lower()]
-        
-        return 0 
-
-    df['id'] = df.apply(fill_id, axis=1)
-    
-    # Final check
-    remaining = ((df['id'] == 0) | (df['id'].isna())).sum()
+    # Keep existing non-zero IDs, fill the rest from the scraped lookup.
+    # Work on raw numpy arrays: one dict.get pass over the names plus a
+    # single np.where — no Series alignment or index hashing in between.
+    ids = pd.to_numeric(df['id'], errors='coerce').to_numpy()
+    names = df['name'].to_numpy()
+    get = name_id_map_lower.get
+    mapped = np.array([get(str(n).strip().lower(), 0) for n in names], dtype=np.int64)
+    df['id'] = np.where((ids == 0) | np.isnan(ids), mapped, ids).astype('int64')
+
+    # Final check (ids are non-null int64 after the fill, so == 0 suffices)
+    remaining = int((df['id'].to_numpy() == 0).sum())
     filled = missing_count - remaining
     
     print(f"✨ Successfully filled {filled} IDs.")
     print(f"⚠️ Still missing: {remaining} (Older historical data).")
     
     df.to_csv(output_file, index=False)
+    df.to_parquet(output_file.replace('.csv', '.parquet'), compression='zstd', index=False)
     print(f"💾 Saved to {output_file}")
 
 if __name__ == "__main__":
@@ -1,11 +1,48 @@
 import pandas as pd
+import pickle
 import requests
 import time
 import re
+import threading
 import urllib3
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metbull_cache
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Compiled once at import — these run inside the hot per-page parse loop
+_ID_RE = re.compile(r'code=(\d+)[^>]*>(.*?)</a>', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+_YEAR_RE = re.compile(r'<td>(\d{4})</td>')
+
+def _fetch_page(session, base_url, page, throttle):
+    """Fetches one result page; returns ({name: id}, oldest year on page)."""
+    # Politeness throttle shared by all workers (~2 requests/sec total),
+    # while the actual network waits still overlap across threads.
+    with throttle:
+        time.sleep(0.5)
+
+    params = {
+        'sea': '*',
+        'sfor': 'names',
+        'srt': 'year',
+        'dir': 'desc',
+        'lrec': '500',
+        'page': str(page)
+    }
+    response = session.get(base_url, params=params, timeout=45, verify=False)
+
+    page_map = {}
+    for code, name_html in _ID_RE.findall(response.text):
+        clean_name = _TAG_RE.sub('', name_html).replace('&nbsp;', ' ').strip()
+        page_map[clean_name] = int(code)
+
+    years_on_page = _YEAR_RE.findall(response.text)
+    min_year = min(int(y) for y in years_on_page) if years_on_page else None
+    return page_map, min_year
+
 def fill_remaining_ids():
     input_file = "Meteorite_Landings_Final.csv" # Load your current progress
     
@@ -17,12 +54,13 @@ def fill_remaining_ids():
         return
 
     # 1. DIAGNOSE: Where are the missing IDs coming from?
+    # (one column scan for the mask, reused everywhere below)
     if 'id' not in df.columns: df['id'] = 0
-    missing_mask = (df['id'] == 0) | (df['id'].isna())
-    missing_count = missing_mask.sum()
-    
+    missing_np = pd.to_numeric(df['id'], errors='coerce').fillna(0).to_numpy() == 0
+    missing_count = int(missing_np.sum())
+
     print(f"🔍 Starting with {missing_count} missing IDs.")
-    
+
     if missing_count == 0:
         print("✅ No missing IDs! You are done.")
         return
@@ -30,7 +68,7 @@ def fill_remaining_ids():
     # Show the user which years are missing data
     # (This confirms if we just need to go deeper into history)
     if 'year_int' in df.columns:
-        missing_years = df[missing_mask]['year_int'].value_counts().head(5)
+        missing_years = df.loc[missing_np, 'year_int'].value_counts().head(5)
         print("   Most missing IDs are from years:", missing_years.to_dict())
 
     # --- DICTIONARY BUILDER ---
@@ -39,80 +77,90 @@ def fill_remaining_ids():
     base_url = "https://www.lpi.usra.edu/meteor/metbull.php"
     headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
     
-    name_id_map = {}
-    
+    # Warm cache: reuse anything scraped in the last 7 days
+    cache = metbull_cache.load_cache()
+    name_id_map = metbull_cache.cached_map(cache)
+    fresh = metbull_cache.fresh_pages(cache)
+    page_maps = {}
+
+    # Crash recovery: fold in the last checkpoint if one survived a hard
+    # kill (clean exits and Ctrl+C are covered by the finally-apply below)
+    try:
+        with open('.metbull_map.pkl', 'rb') as f:
+            checkpoint = pickle.load(f)
+        name_id_map.update(checkpoint)
+        print(f"   ♻️ Restored {len(checkpoint)} pairs from last checkpoint.")
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        pass
+
+    pages = [p for p in range(100, 181) if p not in fresh]
+    if len(pages) < 81:
+        print(f"   ♻️ Cache hit: skipping {81 - len(pages)} fresh pages.")
+
+    # Session = keep-alive connection reuse; 8 workers overlap the network
+    # waits that used to run strictly sequentially with a 1s sleep each
+    session = requests.Session()
+    session.headers.update(headers)
+    throttle = threading.Lock()
+
     # We scan Page 100 to 180 (Covering the remaining ~40,000 older records)
-    for page in range(100, 181):
-        print(f"   ... Scanning Page {page}...", end=" ")
-        
-        params = {
-            'sea': '*',           
-            'sfor': 'names',      
-            'srt': 'year',        
-            'dir': 'desc',        
-            'lrec': '500',        
-            'page': str(page)     
-        }
-        
-        try:
-            response = requests.get(base_url, params=params, headers=headers, timeout=45, verify=False)
-            
-            # Extract ID and Name
-            pattern = r'code=(\d+)[^>]*>(.*?)</a>'
-            matches = re.findall(pattern, response.text, re.IGNORECASE)
-            
-            if not matches:
-                print("⚠️ No links (Page might be empty/done).")
-                # If we hit 3 empty pages in a row, we could stop, but let's just push through.
-            else:
-                new_found = 0
-                for code, name_html in matches:
-                    clean_name = re.sub(r'<[^>]+>', '', name_html).replace('&nbsp;', ' ').strip()
-                    name_id_map[clean_name] = int(code)
-                    new_found += 1
-                
-                print(f"✅ Indexed {new_found} items.", end=" ")
-                
-                # Check what year we are currently looking at (for sanity)
-                years_on_page = re.findall(r'<td>(\d{4})</td>', response.text)
-                if years_on_page:
-                    min_year = min([int(y) for y in years_on_page])
-                    print(f"(Reached Year: {min_year})")
-                else:
-                    print("")
-
-            # Intermediate Save every 10 pages
-            if page % 10 == 0:
-                _apply_and_save(df, name_id_map, input_file)
-            
-            time.sleep(1)
-
-        except Exception as e:
-            print(f"❌ Error on page {page}: {e}")
-            time.sleep(2)
-
-    # --- FINAL APPLY ---
-    print("\n📚 Deep Scan complete. Finalizing dataset...")
-    _apply_and_save(df, name_id_map, input_file)
+    done = 0
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = {executor.submit(_fetch_page, session, base_url, page, throttle): page
+                       for page in pages}
+
+            try:
+                for future in as_completed(futures):
+                    page = futures[future]
+                    try:
+                        page_map, min_year = future.result()
+                    except Exception as e:
+                        print(f"   ❌ Error on page {page}: {e}")
+                        continue
+
+                    if page_map:
+                        name_id_map.update(page_map)
+                        page_maps[page] = page_map
+                        year_note = f" (Reached Year: {min_year})" if min_year else ""
+                        print(f"   ✅ Page {page}: indexed {len(page_map)} items.{year_note}")
+                    else:
+                        print(f"   ⚠️ Page {page}: no links (Page might be empty/done).")
+
+                    # Checkpoint the (small) map every 10 pages instead of
+                    # rewriting the entire ~45k-row CSV each time
+                    done += 1
+                    if done % 10 == 0:
+                        with open('.metbull_map.pkl', 'wb') as f:
+                            pickle.dump(name_id_map, f)
+            except KeyboardInterrupt:
+                # All ~81 pages are queued up front — without this, the
+                # with-block exit would wait for every one of them before
+                # the finally-apply runs. Cancel the queue so only the
+                # in-flight pages finish.
+                print("\n   🛑 Interrupted — cancelling queued pages...")
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+    finally:
+        # --- FINAL APPLY (also runs on Ctrl+C, so progress isn't lost) ---
+        print("\n📚 Deep Scan complete. Finalizing dataset...")
+        metbull_cache.update_cache(cache, page_maps)
+        _apply_and_save(df, name_id_map, input_file)
 
 def _apply_and_save(df, name_id_map, filename):
     name_id_map_lower = {k.lower(): v for k, v in name_id_map.items()}
 
-    def fill_id(row):
-        if pd.notna(row['id']) and row['id'] != 0:
-            return row['id']
-        name = str(row['name']).strip()
-        if name in name_id_map:
-            return name_id_map[name]
-        if name.lower() in name_id_map_lower:
-            return name_id_map_lower[name.lower()]
-        return 0
-
-    df['id'] = df.apply(fill_id, axis=1)
+    # Keep existing non-zero IDs, fill the rest from the scraped lookup —
+    # indexed Series lookup + combine_first, all C-level, no per-row boxing
+    lookup = pd.Series(name_id_map_lower)
+    key = df['name'].astype('string').str.strip().str.lower()
+    existing = df['id'].where(df['id'].fillna(0) != 0)
+    df['id'] = existing.combine_first(key.map(lookup)).fillna(0).astype('int64')
     
-    remaining = ((df['id'] == 0) | (df['id'].isna())).sum()
+    remaining = int((df['id'].to_numpy() == 0).sum())
     print(f"   💾 Saving... Remaining missing: {remaining}")
     df.to_csv(filename, index=False)
+    df.to_parquet(filename.replace('.csv', '.parquet'), compression='zstd', index=False)
 
 if __name__ == "__main__":
     fill_remaining_ids()
\ No newline at end of file
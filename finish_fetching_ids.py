@@ -1,11 +1,47 @@
 import pandas as pd
+import pickle
 import requests
 import time
 import re
+import threading
 import urllib3
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metbull_cache
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Compiled once at import — these run inside the hot per-page parse loop
+_ID_RE = re.compile(r'code=(\d+)[^>]*>(.*?)</a>', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+_YEAR_RE = re.compile(r'<td>(\d{4})</td>')
+
+def _fetch_page(session, base_url, page, throttle):
+    """Fetches one result page; returns ({name: id}, oldest year on page)."""
+    # Politeness throttle (~2 requests/sec total across the workers)
+    with throttle:
+        time.sleep(0.5)
+
+    params = {
+        'sea': '*',
+        'sfor': 'names',
+        'srt': 'year',
+        'dir': 'desc',
+        'lrec': '500',
+        'page': str(page)
+    }
+    response = session.get(base_url, params=params, timeout=45, verify=False)
+
+    page_map = {}
+    for code, name_html in _ID_RE.findall(response.text):
+        clean_name = _TAG_RE.sub('', name_html).replace('&nbsp;', ' ').strip()
+        page_map[clean_name] = int(code)
+
+    years_on_page = _YEAR_RE.findall(response.text)
+    min_year = min(int(y) for y in years_on_page) if years_on_page else None
+    return page_map, min_year
+
 def finish_filling_ids():
     input_file = "Meteorite_Landings_Final.csv" # Load the partially filled one
     
@@ -16,9 +52,9 @@ def finish_filling_ids():
         print("❌ File not found.")
         return
 
-    # Check missing
-    missing_mask = (df['id'] == 0) | (df['id'].isna())
-    missing_count = missing_mask.sum()
+    # Check missing — one column scan instead of equality + isna passes
+    missing_np = pd.to_numeric(df['id'], errors='coerce').fillna(0).to_numpy() == 0
+    missing_count = int(missing_np.sum())
     print(f"🔍 Starting with {missing_count} missing IDs.")
 
     if missing_count == 0:
@@ -33,93 +69,92 @@ def finish_filling_ids():
     base_url = "https://www.lpi.usra.edu/meteor/metbull.php"
     headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
     
-    name_id_map = {}
-    
-    # We scan up to page 100. This covers ~50,000 records.
-    # The loop will likely break early when it hits the year 2012.
-    for page in range(0, 101):
-        print(f"   ... Scanning Page {page}...", end=" ")
-        
-        params = {
-            'sea': '*',           
-            'sfor': 'names',      
-            'srt': 'year',        
-            'dir': 'desc',        
-            'lrec': '500',        
-            'page': str(page)     
-        }
-        
-        try:
-            response = requests.get(base_url, params=params, headers=headers, timeout=45, verify=False)
-            
-            # Regex to capture ID, Name, and importantly, YEAR (to know when to stop)
-            # Table row structure: <tr>...code=123>Name</a>...<td>2024</td>...</tr>
-            # But searching specifically for the ID link is safer for the map.
-            # We will grab ID and Name first.
-            
-            pattern = r'code=(\d+)[^>]*>(.*?)</a>'
-            matches = re.findall(pattern, response.text, re.IGNORECASE)
-            
-            if not matches:
-                print("⚠️ No links found.")
-            else:
-                new_found = 0
-                for code, name_html in matches:
-                    clean_name = re.sub(r'<[^>]+>', '', name_html).replace('&nbsp;', ' ').strip()
-                    name_id_map[clean_name] = int(code)
-                    new_found += 1
-                
-                print(f"✅ Indexed {new_found} items.", end=" ")
+    # Warm cache: reuse anything scraped in the last 7 days
+    cache = metbull_cache.load_cache()
+    name_id_map = metbull_cache.cached_map(cache)
+    fresh = metbull_cache.fresh_pages(cache)
+    page_maps = {}
+
+    # Crash recovery: fold in the last checkpoint if one survived a hard
+    # kill (clean exits and Ctrl+C are covered by the finally-apply below)
+    try:
+        with open('.metbull_map.pkl', 'rb') as f:
+            checkpoint = pickle.load(f)
+        name_id_map.update(checkpoint)
+        print(f"   ♻️ Restored {len(checkpoint)} pairs from last checkpoint.")
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        pass
+
+    pages = [p for p in range(0, 101) if p not in fresh]
+    if len(pages) < 101:
+        print(f"   ♻️ Cache hit: skipping {101 - len(pages)} fresh pages.")
+
+    # Session = keep-alive connection reuse across all pages
+    session = requests.Session()
+    session.headers.update(headers)
+    throttle = threading.Lock()
+
+    # We scan up to page 100 in speculative batches of 8: the pages of a
+    # batch are fetched in parallel, then the AUTO STOP check runs on the
+    # whole batch. The loop will likely stop early when it hits year 2012.
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for start in range(0, len(pages), 8):
+                batch = pages[start:start + 8]
+                futures = {executor.submit(_fetch_page, session, base_url, page, throttle): page
+                           for page in batch}
+
+                oldest_in_batch = None
+                for future in as_completed(futures):
+                    page = futures[future]
+                    try:
+                        page_map, min_year = future.result()
+                    except Exception as e:
+                        print(f"   ❌ Error on page {page}: {e}")
+                        continue
+
+                    if page_map:
+                        name_id_map.update(page_map)
+                        page_maps[page] = page_map
+                        year_note = f" (Oldest on page: {min_year})" if min_year else ""
+                        print(f"   ✅ Page {page}: indexed {len(page_map)} items.{year_note}")
+                    else:
+                        print(f"   ⚠️ Page {page}: no links found.")
+
+                    if min_year is not None:
+                        if oldest_in_batch is None or min_year < oldest_in_batch:
+                            oldest_in_batch = min_year
+
+                # Checkpoint the (small) map after each batch instead of
+                # rewriting the entire ~45k-row CSV each time
+                with open('.metbull_map.pkl', 'wb') as f:
+                    pickle.dump(name_id_map, f)
 
                 # --- AUTO STOP LOGIC ---
-                # Check the text of the response for the Years present on this page
-                # We look for 4-digit years in table cells
-                years_on_page = re.findall(r'<td>(\d{4})</td>', response.text)
-                if years_on_page:
-                    min_year = min([int(y) for y in years_on_page])
-                    print(f"(Oldest on page: {min_year})")
-                    
-                    if min_year < 2012:
-                        print(f"   🛑 Reached historical data (Year {min_year}). Stopping scan.")
-                        break
-                else:
-                    print("(Year check skipped)")
-
-            # --- INTERMEDIATE SAVE (Every 10 pages) ---
-            if page % 10 == 0 and page > 0:
-                print("   💾 Saving intermediate progress...")
-                _apply_and_save(df, name_id_map, input_file)
-            
-            time.sleep(1) 
-
-        except Exception as e:
-            print(f"❌ Error on page {page}: {e}")
-            # Don't break, just retry next page
-            time.sleep(2)
-
-    # --- FINAL APPLY ---
-    print("\n📚 Scan complete. Applying IDs to dataset...")
-    _apply_and_save(df, name_id_map, input_file)
+                if oldest_in_batch is not None and oldest_in_batch < 2012:
+                    print(f"   🛑 Reached historical data (Year {oldest_in_batch}). Stopping scan.")
+                    break
+    finally:
+        # --- FINAL APPLY (also runs on Ctrl+C, so progress isn't lost) ---
+        print("\n📚 Scan complete. Applying IDs to dataset...")
+        metbull_cache.update_cache(cache, page_maps)
+        _apply_and_save(df, name_id_map, input_file)
 
 def _apply_and_save(df, name_id_map, filename):
     # Helper function to map and save
     name_id_map_lower = {k.lower(): v for k, v in name_id_map.items()}
 
-    def fill_id(row):
-        if pd.notna(row['id']) and row['id'] != 0:
-            return row['id']
-        name = str(row['name']).strip()
-        if name in name_id_map:
-            return name_id_map[name]
-        if name.lower() in name_id_map_lower:
-            return name_id_map_lower[name.lower()]
-        return 0
-
-    df['id'] = df.apply(fill_id, axis=1)
+    # Keep existing non-zero IDs, fill the rest from the scraped lookup —
+    # indexed Series lookup + combine_first, all C-level, no per-row boxing
+    lookup = pd.Series(name_id_map_lower)
+    key = df['name'].astype('string').str.strip().str.lower()
+    existing = df['id'].where(df['id'].fillna(0) != 0)
+    df['id'] = existing.combine_first(key.map(lookup)).fillna(0).astype('int64')
     
-    remaining = ((df['id'] == 0) | (df['id'].isna())).sum()
+    remaining = int((df['id'].to_numpy() == 0).sum())
     print(f"   ✨ Current missing: {remaining}")
     df.to_csv(filename, index=False)
+    df.to_parquet(filename.replace('.csv', '.parquet'), compression='zstd', index=False)
 
 if __name__ == "__main__":
     finish_filling_ids()
\ No newline at end of file
@@ -2,10 +2,37 @@ import pandas as pd
 import requests
 import time
 import re
+import threading
 import urllib3
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metbull_cache
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Compiled once at import — these run inside the hot per-page parse loop
+_ID_RE = re.compile(r'code=(\d+)[^>]*>(.*?)</a>', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+def _fetch_page(session, base_url, page, throttle):
+    """Fetches one result page and returns its {name: id} map."""
+    # Politeness throttle (~2 requests/sec total across the workers)
+    with throttle:
+        time.sleep(0.5)
+
+    params = {
+        'sea': '*', 'sfor': 'names', 'srt': 'year', 'dir': 'desc',
+        'lrec': '500', 'page': str(page)
+    }
+    response = session.get(base_url, params=params, timeout=45, verify=False)
+
+    page_map = {}
+    for code, name_html in _ID_RE.findall(response.text):
+        clean_name = _TAG_RE.sub('', name_html).replace('&nbsp;', ' ').strip()
+        page_map[clean_name] = int(code)
+    return page_map
+
 def fix_names_and_fetch_ids():
     input_file = "Meteorite_Landings_Final.csv"
     
@@ -35,9 +62,10 @@ def fix_names_and_fetch_ids():
     # The missing meteorites are mostly 2016-2025, which are on the FIRST 50 PAGES.
     # We just need to re-scan these now that the names match.
     
-    missing_mask = (df['id'] == 0) | (df['id'].isna())
-    missing_count = missing_mask.sum()
-    
+    # One column scan for the missing mask
+    missing_np = pd.to_numeric(df['id'], errors='coerce').fillna(0).to_numpy() == 0
+    missing_count = int(missing_np.sum())
+
     if missing_count == 0:
         print("🎉 No missing IDs! Data is perfect.")
         return
@@ -46,62 +74,59 @@ def fix_names_and_fetch_ids():
 
     base_url = "https://www.lpi.usra.edu/meteor/metbull.php"
     headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-    name_id_map = {}
-    
+    # Warm cache: reuse anything scraped in the last 7 days
+    cache = metbull_cache.load_cache()
+    name_id_map = metbull_cache.cached_map(cache)
+    fresh = metbull_cache.fresh_pages(cache)
+    page_maps = {}
+
+    pages = [p for p in range(0, 61) if p not in fresh]
+    if len(pages) < 61:
+        print(f"   ♻️ Cache hit: skipping {61 - len(pages)} fresh pages.")
+
+    # Session = keep-alive connection reuse; 8 workers overlap network waits
+    session = requests.Session()
+    session.headers.update(headers)
+    throttle = threading.Lock()
+
     # Scan first 60 pages (30,000 records). This covers the last ~10-15 years easily.
-    for page in range(0, 61):
-        print(f"   ... Scanning Page {page}...", end=" ")
-        
-        params = {
-            'sea': '*', 'sfor': 'names', 'srt': 'year', 'dir': 'desc',
-            'lrec': '500', 'page': str(page)
-        }
-        
-        try:
-            response = requests.get(base_url, params=params, headers=headers, timeout=45, verify=False)
-            
-            # Extract IDs and Names
-            pattern = r'code=(\d+)[^>]*>(.*?)</a>'
-            matches = re.findall(pattern, response.text, re.IGNORECASE)
-            
-            if matches:
-                count = 0
-                for code, name_html in matches:
-                    clean_name = re.sub(r'<[^>]+>', '', name_html).replace('&nbsp;', ' ').strip()
-                    name_id_map[clean_name] = int(code)
-                    count += 1
-                print(f"✅ Indexed {count} meteorites.")
-            else:
-                print("⚠️ No links.")
-            
-            time.sleep(0.5)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = {executor.submit(_fetch_page, session, base_url, page, throttle): page
+                   for page in pages}
+
+        for future in as_completed(futures):
+            page = futures[future]
+            try:
+                page_map = future.result()
+            except Exception as e:
+                print(f"   ❌ Error on page {page}: {e}")
+                continue
 
-        except Exception as e:
-            print(f"❌ Error: {e}")
+            if page_map:
+                name_id_map.update(page_map)
+                page_maps[page] = page_map
+                print(f"   ✅ Page {page}: indexed {len(page_map)} meteorites.")
+            else:
+                print(f"   ⚠️ Page {page}: no links.")
 
     # --- STEP 3: APPLY MAP ---
     print("🔄 Applying new IDs...")
+    metbull_cache.update_cache(cache, page_maps)
     
     name_id_map_lower = {k.lower(): v for k, v in name_id_map.items()}
 
-    def fill_id(row):
-        if pd.notna(row['id']) and row['id'] != 0:
-            return row['id']
-        
-        name = str(row['name']).strip()
-        # Try exact match
-        if name in name_id_map: return name_id_map[name]
-        # Try lowercase match
-        if name.lower() in name_id_map_lower: return name_id_map_lower[name.lower()]
-        
-        return 0
-
-    df['id'] = df.apply(fill_id, axis=1)
+    # Keep existing non-zero IDs, fill the rest from the scraped lookup —
+    # indexed Series lookup + combine_first, all C-level, no per-row boxing
+    lookup = pd.Series(name_id_map_lower)
+    key = df['name'].astype('string').str.strip().str.lower()
+    existing = df['id'].where(df['id'].fillna(0) != 0)
+    df['id'] = existing.combine_first(key.map(lookup)).fillna(0).astype('int64')
     
-    final_missing = ((df['id'] == 0) | (df['id'].isna())).sum()
+    final_missing = int((df['id'].to_numpy() == 0).sum())
     print(f"✨ Success! Remaining missing: {final_missing}")
     
     df.to_csv("Meteorite_Landings_Final.csv", index=False)
+    df.to_parquet("Meteorite_Landings_Final.parquet", compression='zstd', index=False)
     print("💾 Saved to Meteorite_Landings_Final.csv")
 
 if __name__ == "__main__":
@@ -0,0 +1,53 @@
+import os
+import time
+
+import pandas as pd
+
+# Shared on-disk cache of the Meteoritical Bulletin scrape, so repeat runs of
+# the ID scripts don't hammer lpi.usra.edu with hundreds of requests for
+# pages we already indexed. One row per (page, name, code) with a timestamp.
+CACHE_FILE = "metbull_cache.parquet"
+MAX_AGE_DAYS = 7
+
+
+def load_cache():
+    """Loads the cached scrape (columns: page, name, code, fetched_at)."""
+    if not os.path.exists(CACHE_FILE):
+        return pd.DataFrame(columns=['page', 'name', 'code', 'fetched_at'])
+    try:
+        return pd.read_parquet(CACHE_FILE)
+    except Exception:
+        # Corrupt/old cache? Just rebuild from scratch.
+        return pd.DataFrame(columns=['page', 'name', 'code', 'fetched_at'])
+
+
+def fresh_pages(cache, max_age_days=MAX_AGE_DAYS):
+    """Returns the set of page numbers recent enough to skip re-fetching."""
+    if cache.empty:
+        return set()
+    cutoff = time.time() - max_age_days * 86400
+    return set(cache.loc[cache['fetched_at'] >= cutoff, 'page'].unique().tolist())
+
+
+def cached_map(cache):
+    """Rebuilds the name -> id dict from the cached rows (a ~1s dict load)."""
+    if cache.empty:
+        return {}
+    return dict(zip(cache['name'], cache['code']))
+
+
+def update_cache(cache, page_maps):
+    """Merges freshly scraped {page: {name: code}} results and saves to disk."""
+    now = time.time()
+    rows = [
+        {'page': page, 'name': name, 'code': code, 'fetched_at': now}
+        for page, page_map in page_maps.items()
+        for name, code in page_map.items()
+    ]
+    if not rows:
+        return cache
+    # Replace any stale rows for the re-fetched pages
+    cache = pd.concat([cache[~cache['page'].isin(page_maps)], pd.DataFrame(rows)],
+                      ignore_index=True)
+    cache.to_parquet(CACHE_FILE, index=False)
+    return cache
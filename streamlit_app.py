@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import numpy as np
 import requests
 import re
 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from sklearn.cluster import DBSCAN
 from sklearn.metrics import homogeneity_score
 
@@ -55,106 +59,190 @@ def inject_custom_css():
     </style>
     """, unsafe_allow_html=True)
 
+@st.cache_data(show_spinner=False)
 def evaluate_clustering(df):
-    clustered_df = df[df['cluster_id'] != -1].copy()
-    
-    if clustered_df.empty:
+    cluster_ids = df['cluster_id'].to_numpy()
+    clustered = cluster_ids != -1
+
+    if not clustered.any():
         return 0, 0, "None"
-    
+
     # --- THE FIX: Normalize Names ---
     # We strip out numbers to compare "Base Names"
     # Example: "Yamato 000593" -> "Yamato"
     # Example: "Allan Hills 84001" -> "Allan Hills"
-    def get_base_name(name):
-        # Remove digits and clean up whitespace
-        return re.sub(r'\d+', '', str(name)).strip()
-        
-    clustered_df['base_name'] = clustered_df['name'].apply(get_base_name)
-    
+    # One compiled-regex sweep over the whole column instead of a Python
+    # re.sub call per row (this runs on every interactive rerun).
+    base_names = df.loc[clustered, 'name'].astype(str).str.replace(r'\d+', '', regex=True).str.strip()
+    labels = cluster_ids[clustered]
+
+    # Integer-encode the names once; everything below runs as bincounts
+    # over small int arrays instead of string groupby/mode passes
+    name_codes, name_uniques = pd.factorize(base_names)
+
     # 1. Homogeneity: Check consistency of the BASE name
-    # This rewards the AI for grouping all "Yamato" meteorites together, 
+    # This rewards the AI for grouping all "Yamato" meteorites together,
     # even if they have different numbers.
-    score = homogeneity_score(clustered_df['base_name'], clustered_df['cluster_id'])
-    
+    score = homogeneity_score(name_codes, labels)
+
     # 2. Noise Ratio
-    total_points = len(df)
-    noise_points = len(df[df['cluster_id'] == -1])
-    noise_ratio = (noise_points / total_points) * 100
-    
-    # 3. Identify the "King" of the largest cluster
-    largest_cluster_id = clustered_df['cluster_id'].value_counts().idxmax()
-    largest_cluster = clustered_df[clustered_df['cluster_id'] == largest_cluster_id]
-    
-    # Return the most common base name (e.g., "Yamato")
-    top_name = largest_cluster['base_name'].mode()[0]
-    
+    noise_ratio = (1.0 - clustered.mean()) * 100
+
+    # 3. Identify the "King" of the largest cluster: biggest label by
+    # bincount, then the most common base name inside it (e.g., "Yamato")
+    largest_cluster_id = int(np.bincount(labels).argmax())
+    top_name = name_uniques[np.bincount(name_codes[labels == largest_cluster_id]).argmax()]
+
     return score * 100, noise_ratio, top_name
 
 # --- DATA LOADING ---
+# Explicit dtypes skip pandas' whole-file type inference and keep string
+# columns out of object dtype ('id' stays float here: the CSV stores "1.0").
+CSV_DTYPES = {
+    'name': 'string', 'id': 'float64', 'recclass': 'category',
+    'mass (g)': 'float32', 'fall': 'category', 'year': 'float32',
+    'reclat': 'float32', 'reclong': 'float32', 'year_int': 'int32',
+    'mass_log': 'float32', 'category_broad': 'category',
+}
+
 @st.cache_data
 def load_data():
     """Loads and categorizes meteorite data."""
     file_path = "Meteorite_Landings_Final.csv"
+    parquet_path = "Meteorite_Landings_Final.parquet"
     try:
-        df = pd.read_csv(file_path)
-    except FileNotFoundError:
-        st.error(f"Error: '{file_path}' not found.")
-        return pd.DataFrame()
+        # Parquet first: typed columnar load, ~10x faster than re-parsing CSV
+        df = pd.read_parquet(parquet_path)
+    except (FileNotFoundError, OSError):
+        try:
+            df = pd.read_csv(file_path, usecols=list(CSV_DTYPES), dtype=CSV_DTYPES)
+        except FileNotFoundError:
+            st.error(f"Error: '{file_path}' not found.")
+            return pd.DataFrame()
 
     # --- NEW: Categorize Classes for better Coloring ---
-    def get_category(c):
-        c = str(c).lower()
-        if 'iron' in c or 'mesosiderite' in c or 'pallasite' in c:
-            return 'Iron / Stony-Iron'
-        elif 'chondrite' in c:
-            return 'Stony (Chondrite)'
-        elif 'achondrite' in c or 'martian' in c or 'lunar' in c:
-            return 'Stony (Achondrite)'
-        else:
-            return 'Other / Unknown'
-
-    df['category_broad'] = df['recclass'].apply(get_category)
+    # Vectorized: one regex pass per group in C instead of a Python call
+    # per row. Order matters (iron/pallasite first) to match the old chain.
+    s = df['recclass'].astype('string').str.lower()
+    conds = [
+        s.str.contains('iron|mesosiderite|pallasite', regex=True, na=False),
+        s.str.contains('chondrite', na=False),
+        s.str.contains('achondrite|martian|lunar', regex=True, na=False),
+    ]
+    choices = ['Iron / Stony-Iron', 'Stony (Chondrite)', 'Stony (Achondrite)']
+    df['category_broad'] = pd.Categorical(np.select(conds, choices, default='Other / Unknown'))
     df['id'] = df['id'].astype(int)
+
+    # --- Downcast: halves the cached frame's memory footprint, and every
+    # downstream filter/aggregation moves half the bytes ---
+    df['id'] = pd.to_numeric(df['id'], downcast='integer')
+    df['year_int'] = pd.to_numeric(df['year_int'], downcast='integer')
+    for c in ['reclat', 'reclong', 'mass (g)', 'mass_log', 'year']:
+        df[c] = pd.to_numeric(df[c], downcast='float')
+    for c in ['recclass', 'fall']:
+        df[c] = df[c].astype('category')
+
+    # Arrow-backed strings: one contiguous buffer per column instead of a
+    # PyObject* per cell, and the search's contains() runs in an Arrow
+    # compute kernel rather than a Python-object loop
+    df['name'] = df['name'].astype('string[pyarrow]')
+
+    # Case-folded once here so the per-keystroke name search is a plain
+    # fixed-string scan instead of a case-insensitive regex over the column
+    df['name_lc'] = df['name'].str.lower()
+
+    # Marker size for the map — mass is immutable at runtime, so compute
+    # this once here instead of on every render of the filtered frame
+    df['size_safe'] = np.log10(df['mass (g)'].fillna(0).to_numpy() + 1).astype('float32')
     return df
 
 df_meteorites = load_data()
 if df_meteorites.empty:
     st.stop()
 
-@st.cache_data
+def _build_map_fig(df_map_viz, color_col, is_discrete, color_map, color_scale, title_text, map_view):
+    """Builds the map Figure for the current filters / color mode / view.
+
+    Deliberately NOT a cache_* function: the call site stores one figure
+    per session in st.session_state keyed on the filter signature, so
+    appearance-only reruns reuse it, a filter change replaces it (bounded
+    memory), and mutating it (the dot-size sizeref retune) can't race
+    with another session.
+    """
+    common_args = dict(
+        data_frame=df_map_viz, lat="reclat", lon="reclong",
+        size="size_safe", size_max=10,
+        hover_name="name", custom_data=['mass (g)', 'year_int', 'recclass', 'fall', 'category_broad'],
+        title=title_text, template="plotly_dark", opacity=0.8
+    )
+
+    if map_view:
+        if is_discrete:
+            colors_args = {'color_discrete_map': color_map} if color_map else {}
+            fig = px.scatter_geo(**common_args, color=color_col, **colors_args, projection="orthographic")
+        else:
+            fig = px.scatter_geo(**common_args, color=color_col, color_continuous_scale=color_scale, projection="orthographic")
+        fig.update_geos(bgcolor='rgba(0,0,0,0)', showocean=True, oceancolor="#111111", showland=True, landcolor="#262626", showcountries=True, countrycolor="#444444")
+    else:
+        if is_discrete:
+            colors_args = {'color_discrete_map': color_map} if color_map else {}
+            fig = px.scatter_mapbox(**common_args, color=color_col, **colors_args, zoom=1, mapbox_style="carto-darkmatter")
+        else:
+            fig = px.scatter_mapbox(**common_args, color=color_col, color_continuous_scale=color_scale, zoom=1, mapbox_style="carto-darkmatter")
+
+    fig.update_traces(hovertemplate="<b>%{hovertext}</b><br>Type: %{customdata[2]}<br>Mass: %{customdata[0]:,.0f}g<br>Year: %{customdata[1]}<extra></extra>")
+    fig.update_layout(height=700, margin={"r":0,"t":40,"l":0,"b":0}, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', legend=dict(yanchor="top", y=0.95, xanchor="left", x=0.01, bgcolor="rgba(0,0,0,0.5)"))
+    return fig
+
+@st.cache_data(show_spinner=False)
+def _csv_bytes(df):
+    """Download payload for a frame, cached so reruns don't re-encode it.
+
+    Hashing the frame for the cache lookup is far cheaper than string-
+    formatting every cell again on each widget interaction.
+    """
+    return df.drop(columns=['name_lc', 'size_safe'], errors='ignore').to_csv(index=False).encode('utf-8')
+
+@st.cache_data(show_spinner=False)
+def _cached_cluster_labels(coords_bytes, n, epsilon_rad, min_samples):
+    """Memoized DBSCAN run, keyed on the raw coordinate bytes.
+
+    Keying on bytes (instead of letting Streamlit hash a whole DataFrame)
+    means unrelated reruns — dot size, 3D toggle — hit the cache and skip
+    the clustering entirely.
+    """
+    coords_rad = np.frombuffer(coords_bytes, dtype=np.float32).reshape(n, 2)
+    # metric='haversine' is crucial for Lat/Lon data
+    # n_jobs=-1 parallelizes the neighbor queries across all cores
+    db = DBSCAN(eps=epsilon_rad, min_samples=min_samples, algorithm='ball_tree', metric='haversine', n_jobs=-1)
+    return db.fit_predict(coords_rad)
+
 def detect_strewn_fields(df, epsilon_km=50, min_samples=5):
     """
     Uses DBSCAN clustering to find groups of meteorites (Strewn Fields).
-    
+
     Parameters:
     - epsilon_km: The maximum distance between two points to be considered neighbors (in km).
     - min_samples: The minimum number of meteorites to form a cluster.
     """
     # 1. Prepare coordinates (DBSCAN requires radians for Haversine metric)
+    # float32 halves the memory the BallTree has to move around
     coords = df[['reclat', 'reclong']].dropna()
-    coords_rad = np.radians(coords)
-    
+    coords_rad = np.radians(coords.to_numpy(dtype=np.float32))
+
     # 2. Earth radius in km (approx 6371)
     # Epsilon in radians = km / earth_radius
     epsilon_rad = epsilon_km / 6371.0088
-    
-    # 3. Run DBSCAN
-    # metric='haversine' is crucial for Lat/Lon data
-    db = DBSCAN(eps=epsilon_rad, min_samples=min_samples, algorithm='ball_tree', metric='haversine')
-    
-    # 4. Fit and predict
-    cluster_labels = db.fit_predict(coords_rad)
-    
+
+    # 3. Run DBSCAN (cached — only re-runs when the coordinates change)
+    cluster_labels = _cached_cluster_labels(coords_rad.tobytes(), len(coords), epsilon_rad, min_samples)
+
     # 5. Map back to original indices
-    # We create a series indexed by the original indices of the coords
-    cluster_series = pd.Series(cluster_labels, index=coords.index)
-    
-    # 6. Merge back into original dataframe
-    # -1 means 'Noise' (not in a cluster)
-    df_result = df.copy()
-    df_result['cluster_id'] = -1 
-    df_result.loc[cluster_series.index, 'cluster_id'] = cluster_series
-    
+    # -1 means 'Noise' (not in a cluster). Preallocating the column as int32
+    # avoids the NaN-driven int -> float -> int round trip of the old merge.
+    df_result = df.assign(cluster_id=np.full(len(df), -1, dtype=np.int32))
+    df_result.loc[coords.index, 'cluster_id'] = cluster_labels.astype(np.int32)
+
     return df_result
 
 # --- PRE-CALCULATIONS ---
@@ -165,6 +253,37 @@ max_year = int(df_meteorites['year_int'].max())
 
 unique_classes = sorted(df_meteorites['recclass'].unique())
 
+# Cached for the same reason as _famous_idx below: module-level code runs
+# on every rerun, so the full column scan only happens on the first one
+@st.cache_data(show_spinner=False)
+def _fell_percent():
+    return float((df_meteorites['fall'] == 'Fell').mean() * 100)
+
+FELL_PERCENT = _fell_percent()
+
+# Targets stored pre-lowercased to match the name_lc column directly
+FAMOUS_SITES = {
+    "Jump to...": None,
+    "Hoba (Heaviest on Earth)": "hoba",
+    "Willamette (Largest in USA)": "willamette",
+    "Allende (Oldest Matter)": "allende",
+    "Chelyabinsk (Viral Video 2013)": "chelyabinsk",
+    "Sikhote-Alin (Iron Shower)": "sikhote-alin",
+}
+
+# Row positions for each tour target. Streamlit re-executes this whole
+# script on every widget interaction, so the five column scans live in a
+# cached body — reruns get the stored dict and the tour jump stays a
+# dict lookup plus a tiny gather.
+@st.cache_data(show_spinner=False)
+def _famous_idx():
+    return {
+        target: np.flatnonzero(df_meteorites['name_lc'].str.contains(target, regex=False, na=False).to_numpy())
+        for target in FAMOUS_SITES.values() if target
+    }
+
+FAMOUS_IDX = _famous_idx()
+
 PRESETS = {
     "All": (min_log_mass, max_log_mass),
     "0g - 1kg": (np.log10(0+1), np.log10(1000+1)),
@@ -194,33 +313,12 @@ if page == "Interactive Map":
     st.sidebar.header("Exploration Tools")
     search_query = st.sidebar.text_input("Find by Name:", placeholder="e.g. Allende, Hoba")
     
-    famous_sites = {
-        "Jump to...": None,
-        "Hoba (Heaviest on Earth)": "Hoba",
-        "Willamette (Largest in USA)": "Willamette",
-        "Allende (Oldest Matter)": "Allende",
-        "Chelyabinsk (Viral Video 2013)": "Chelyabinsk",
-        "Sikhote-Alin (Iron Shower)": "Sikhote-Alin",
-    }
-    selected_tour = st.sidebar.selectbox("or Visit Famous Sites:", options=famous_sites.keys())
-    
-    st.sidebar.divider()
-
-    # B. MAP APPEARANCE
-    st.sidebar.header("Map Appearance")
-    
-    color_mode = st.sidebar.radio(
-        "Color Points By:", 
-        ["Mass (Heatmap)", "Composition (Type)", "Discovery (Fell vs Found)", "AI Analysis: Strewn Fields"],
-        index=0
-    )
-    
-    map_view = st.sidebar.checkbox("3D Globe", value=False)
-    dot_size = st.sidebar.slider("Dot Size", min_value=3, max_value=30, value=10)
+    selected_tour = st.sidebar.selectbox("or Visit Famous Sites:", options=FAMOUS_SITES.keys())
     
     st.sidebar.divider()
 
-    # C. DATA FILTERS
+    # B. DATA FILTERS (the appearance controls moved into the map fragment
+    # below so they can rerun just the plot, not this whole page)
     st.sidebar.header("Filter Data")
     
     with st.sidebar.expander("Mass Range", expanded=True):
@@ -258,33 +356,38 @@ if page == "Interactive Map":
 
 
     # --- 2. APPLY FILTER LOGIC ---
-    df_filtered = df_meteorites.copy()
-
+    # One fused boolean mask over raw numpy arrays, one indexing pass at the
+    # end — no leading .copy() and no intermediate DataFrame per filter stage.
     if search_query:
-        df_filtered = df_filtered[df_filtered['name'].str.contains(search_query, case=False)]
+        q = search_query.lower()
+        df_filtered = df_meteorites[df_meteorites['name_lc'].str.contains(q, regex=False, na=False)]
     elif selected_tour != "Jump to...":
-        tour_name = famous_sites[selected_tour]
-        df_filtered = df_filtered[df_filtered['name'].str.contains(tour_name, case=False)]
+        df_filtered = df_meteorites.take(FAMOUS_IDX[FAMOUS_SITES[selected_tour]])
     else:
-        df_filtered = df_filtered[
-            (df_filtered['mass_log'] >= selected_log_mass[0]) &
-            (df_filtered['mass_log'] <= selected_log_mass[1]) &
-            (df_filtered['year_int'] >= selected_year[0]) &
-            (df_filtered['year_int'] <= selected_year[1])
-        ]
-        
+        mass_log = df_meteorites['mass_log'].to_numpy()
+        year_int = df_meteorites['year_int'].to_numpy()
+        mask = (
+            (mass_log >= selected_log_mass[0]) & (mass_log <= selected_log_mass[1]) &
+            (year_int >= selected_year[0]) & (year_int <= selected_year[1])
+        )
+
         if fall_status != 'All':
-            df_filtered = df_filtered[df_filtered['fall'] == fall_status]
-            
+            # categorical == compares int codes, not strings
+            mask &= (df_meteorites['fall'] == fall_status).to_numpy()
+
         if selected_broad_classes:
-            df_filtered = df_filtered[df_filtered['category_broad'].isin(selected_broad_classes)]
+            mask &= df_meteorites['category_broad'].isin(selected_broad_classes).to_numpy()
+
+        # gather once through the integer positions (C take path) rather
+        # than handing pandas the boolean mask to re-materialize
+        df_filtered = df_meteorites.take(np.flatnonzero(mask))
 
 
     # --- 3. EXPORT ---
     if not df_filtered.empty:
         st.sidebar.divider()
         st.sidebar.header("Data Tools")
-        st.sidebar.download_button("📥 Download CSV", df_filtered.to_csv(index=False).encode('utf-8'), "meteorites_filtered.csv", "text/csv")
+        st.sidebar.download_button("📥 Download CSV", _csv_bytes(df_filtered), "meteorites_filtered.csv", "text/csv")
 
 
     # --- 4. MAIN PAGE LAYOUT ---
@@ -308,213 +411,259 @@ if page == "Interactive Map":
     
     st.markdown("<br>", unsafe_allow_html=True)
 
-    # --- MAP PLOT ---
-    if df_filtered.empty:
-        st.warning("No meteorites found for the selected filters.")
-    else:
-        df_plot = df_filtered.copy()
-        df_plot['size_safe'] = np.log10(df_plot['mass (g)'].fillna(0) + 1)
-        
-        color_scale = px.colors.sequential.Reds
-        is_discrete = False
-        color_map = {}
-        title_text = "Meteorite Landings"
-
-        if color_mode == "AI Analysis: Strewn Fields":
-            if 'detect_strewn_fields' in globals():
-                # 1. Run Model
-                radius = 50
-                df_plot = detect_strewn_fields(df_plot, epsilon_km=radius, min_samples=5)
-                df_plot['color_group'] = df_plot['cluster_id'].apply(lambda x: f"Cluster {x}" if x >= 0 else "Isolated Fall")
+    # --- MAP PLOT (fragment) ---
+    # Interacting with the appearance controls reruns only this block —
+    # the filter logic, metrics, and export above don't re-execute. Widgets
+    # must live inside a fragment for their reruns to be scoped to it, so
+    # the appearance controls render here above the map instead of in the
+    # sidebar.
+    @st.fragment
+    def render_map(df_filtered):
+        a1, a2, a3 = st.columns([2, 1, 1])
+        color_mode = a1.radio(
+            "Color Points By:",
+            ["Mass (Heatmap)", "Composition (Type)", "Discovery (Fell vs Found)", "AI Analysis: Strewn Fields"],
+            index=0, horizontal=True
+        )
+        map_view = a2.checkbox("3D Globe", value=False)
+        dot_size = a3.slider("Dot Size", min_value=3, max_value=30, value=10)
+
+        # --- MAP PLOT ---
+        if df_filtered.empty:
+            st.warning("No meteorites found for the selected filters.")
+        else:
+            df_plot = df_filtered.copy()
+
+
+            color_scale = px.colors.sequential.Reds
+            is_discrete = False
+            color_map = {}
+            title_text = "Meteorite Landings"
+            ai_applied = False
+
+            if color_mode == "AI Analysis: Strewn Fields":
+                # DBSCAN only runs on explicit request. The labelled frame is
+                # pinned in session_state keyed by the filter signature, so
+                # unrelated reruns reuse it and a filter change invalidates it.
+                ai_sig = (search_query, selected_tour, selected_log_mass, selected_year,
+                          tuple(selected_broad_classes), fall_status)
+                if st.button("🧠 Run AI Analysis", type="primary"):
+                    radius = 50
+                    st.session_state['ai_result'] = (ai_sig, detect_strewn_fields(df_plot, epsilon_km=radius, min_samples=5))
+
+                ai_stored = st.session_state.get('ai_result')
+                if ai_stored is not None and ai_stored[0] == ai_sig:
+                    ai_applied = True
+                    df_plot = ai_stored[1]
+                    # Categorical labels: Plotly serializes int codes + a small
+                    # string table instead of one Python string per point
+                    labels = df_plot['cluster_id'].to_numpy()
+                    df_plot['color_group'] = pd.Categorical(
+                        np.where(labels >= 0, np.char.add('Cluster ', labels.astype(str)), 'Isolated Fall')
+                    )
                 
-                # 2. Setup Plot Args
-                color_col = "color_group"
-                is_discrete = True
-                title_text = "AI Detected Strewn Fields"
-                color_map = {"Isolated Fall": "#444444"} 
+                    # 2. Setup Plot Args
+                    color_col = "color_group"
+                    is_discrete = True
+                    title_text = "AI Detected Strewn Fields"
+                    color_map = {"Isolated Fall": "#444444"} 
                 
-                # --- AI EVALUATION PANEL (STYLED) ---
-                st.markdown("### 🧠 AI Performance Report")
+                    # --- AI EVALUATION PANEL (STYLED) ---
+                    st.markdown("### 🧠 AI Performance Report")
                 
-                # Calculate Metrics
-                purity_score, noise_pct, top_cluster_name = evaluate_clustering(df_plot)
+                    # Calculate Metrics
+                    purity_score, noise_pct, top_cluster_name = evaluate_clustering(df_plot)
                 
-                k1, k2, k3 = st.columns(3)
+                    k1, k2, k3 = st.columns(3)
                 
-                k1.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-title" title="How often does a cluster contain only ONE type of meteorite?">Cluster Consistency</div>
-                    <div class="metric-value">{purity_score:.1f}%</div>
-                </div>
-                """, unsafe_allow_html=True)
+                    k1.markdown(f"""
+                    <div class="metric-card">
+                        <div class="metric-title" title="How often does a cluster contain only ONE type of meteorite?">Cluster Consistency</div>
+                        <div class="metric-value">{purity_score:.1f}%</div>
+                    </div>
+                    """, unsafe_allow_html=True)
                 
-                k2.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-title" title="Percentage of meteorites that are isolated (not part of any cluster).">Noise Ratio</div>
-                    <div class="metric-value">{noise_pct:.1f}%</div>
-                </div>
-                """, unsafe_allow_html=True)
+                    k2.markdown(f"""
+                    <div class="metric-card">
+                        <div class="metric-title" title="Percentage of meteorites that are isolated (not part of any cluster).">Noise Ratio</div>
+                        <div class="metric-value">{noise_pct:.1f}%</div>
+                    </div>
+                    """, unsafe_allow_html=True)
                 
-                k3.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-title" title="The meteorite name associated with the biggest detected group.">Largest Cluster</div>
-                    <div class="metric-value" style="font-size: 24px;">{top_cluster_name}</div>
-                </div>
-                """, unsafe_allow_html=True)
+                    k3.markdown(f"""
+                    <div class="metric-card">
+                        <div class="metric-title" title="The meteorite name associated with the biggest detected group.">Largest Cluster</div>
+                        <div class="metric-value" style="font-size: 24px;">{top_cluster_name}</div>
+                    </div>
+                    """, unsafe_allow_html=True)
                 
-                # Visual Explanation
-                with st.expander("See details", expanded=False):
-                    st.write("""
-                    **How to interpret this:**
-                    *   **High Consistency (>80%):** The AI successfully grouped meteorites of the same name together (e.g., grouping all "Yamato" fragments).
-                    *   **High Noise:** This is normal! Most meteorites fall alone. Only large events (showers) create clusters.
-                    """)
+                    # Visual Explanation
+                    with st.expander("See details", expanded=False):
+                        st.write("""
+                        **How to interpret this:**
+                        *   **High Consistency (>80%):** The AI successfully grouped meteorites of the same name together (e.g., grouping all "Yamato" fragments).
+                        *   **High Noise:** This is normal! Most meteorites fall alone. Only large events (showers) create clusters.
+                        """)
                     
-                    # Show top clusters
-                    if 'cluster_id' in df_plot.columns:
-                        top_clusters = df_plot[df_plot['cluster_id'] != -1]['cluster_id'].value_counts().head(5)
-                        if not top_clusters.empty:
-                            st.write("**Top 5 Detected Strewn Fields (by size):**")
-                            st.bar_chart(top_clusters)
-
-            else:
-                st.error("AI function missing.")
+                        # Show top clusters
+                        if 'cluster_id' in df_plot.columns:
+                            top_clusters = df_plot[df_plot['cluster_id'] != -1]['cluster_id'].value_counts().head(5)
+                            if not top_clusters.empty:
+                                st.write("**Top 5 Detected Strewn Fields (by size):**")
+                                st.bar_chart(top_clusters)
+
+                else:
+                    st.info("Click **Run AI Analysis** to detect strewn fields in the current selection.")
+                    color_col = "mass_log"
+
+            elif color_mode == "Mass (Heatmap)":
                 color_col = "mass_log"
-
-        elif color_mode == "Mass (Heatmap)":
-            color_col = "mass_log"
-            color_scale = px.colors.sequential.Magma
-            is_discrete = False
-            title_text = "Meteorites by Mass"
+                color_scale = px.colors.sequential.Magma
+                is_discrete = False
+                title_text = "Meteorites by Mass"
             
-        elif color_mode == "Composition (Type)":
-            color_col = "category_broad"
-            is_discrete = True
-            title_text = "Meteorites by Composition"
-            color_map = {'Stony (Chondrite)': '#A8A878', 'Iron / Stony-Iron': '#B8B8D0', 'Stony (Achondrite)': '#C03028', 'Other / Unknown': '#68A090'}
-        else:
-            color_col = "fall"
-            is_discrete = True
-            title_text = "Meteorites by Discovery Method"
-            color_map = {'Fell': '#78C850', 'Found': '#F08030'}
-
-        # Optimization
-        df_map_viz = df_plot.dropna(subset=['reclat', 'reclong'])
-        opt_note = ""
-        if map_view and len(df_map_viz) > 5000:
-            df_map_viz = df_map_viz.sort_values('mass (g)', ascending=False).head(5000)
-            opt_note = "3D Optimization: Showing top 5,000 heaviest meteorites."
-
-        common_args = dict(
-            data_frame=df_map_viz, lat="reclat", lon="reclong",
-            size="size_safe", size_max=dot_size,
-            hover_name="name", custom_data=['mass (g)', 'year_int', 'recclass', 'fall', 'category_broad'],
-            title=title_text, template="plotly_dark", opacity=0.8
-        )
-
-        if map_view:
-            if is_discrete:
-                colors_args = {'color_discrete_map': color_map} if color_map else {}
-                fig = px.scatter_geo(**common_args, color=color_col, **colors_args, projection="orthographic")
+            elif color_mode == "Composition (Type)":
+                color_col = "category_broad"
+                is_discrete = True
+                title_text = "Meteorites by Composition"
+                color_map = {'Stony (Chondrite)': '#A8A878', 'Iron / Stony-Iron': '#B8B8D0', 'Stony (Achondrite)': '#C03028', 'Other / Unknown': '#68A090'}
             else:
-                fig = px.scatter_geo(**common_args, color=color_col, color_continuous_scale=color_scale, projection="orthographic")
-            fig.update_geos(bgcolor='rgba(0,0,0,0)', showocean=True, oceancolor="#111111", showland=True, landcolor="#262626", showcountries=True, countrycolor="#444444")
-            controls = "🖱️ Drag to rotate • Scroll to zoom"
-        else:
-            if is_discrete:
-                colors_args = {'color_discrete_map': color_map} if color_map else {}
-                fig = px.scatter_mapbox(**common_args, color=color_col, **colors_args, zoom=1, mapbox_style="carto-darkmatter")
+                color_col = "fall"
+                is_discrete = True
+                title_text = "Meteorites by Discovery Method"
+                color_map = {'Fell': '#78C850', 'Found': '#F08030'}
+
+            # Optimization
+            df_map_viz = df_plot.dropna(subset=['reclat', 'reclong'])
+            opt_note = ""
+            if map_view and len(df_map_viz) > 5000:
+                # partial selection (argpartition) — no need to sort the full frame
+                df_map_viz = df_map_viz.nlargest(5000, 'mass (g)')
+                opt_note = "3D Optimization: Showing top 5,000 heaviest meteorites."
+
+            # Hand Plotly only the columns it actually serializes — lat/lon and
+            # size_safe are float32, the hover columns categoricals, so the JSON
+            # payload stays a fraction of the full frame's
+            viz_cols = ['reclat', 'reclong', 'size_safe', 'name',
+                        'mass (g)', 'year_int', 'recclass', 'fall', 'category_broad']
+            if color_col not in viz_cols:
+                viz_cols.append(color_col)
+            df_map_viz = df_map_viz[viz_cols]
+
+            # One figure per session, keyed on everything that changes its
+            # traces/layout; dot_size is deliberately excluded — it's applied
+            # below via sizeref without rebuilding the figure. session_state
+            # (not cache_resource) so the slot is per-session and bounded:
+            # a new signature replaces the old figure instead of accumulating.
+            # ai_applied matters: in AI mode the same filters render either
+            # the mass-colored prompt map or the cluster map, depending on
+            # whether a matching ai_result is in session_state.
+            fig_sig = (search_query, selected_tour, selected_log_mass, selected_year,
+                       tuple(selected_broad_classes), fall_status, color_mode, map_view,
+                       ai_applied)
+            fig_stored = st.session_state.get('map_fig')
+            if fig_stored is not None and fig_stored[0] == fig_sig:
+                fig = fig_stored[1]
             else:
-                fig = px.scatter_mapbox(**common_args, color=color_col, color_continuous_scale=color_scale, zoom=1, mapbox_style="carto-darkmatter")
-            controls = "🖱️ Scroll to zoom • Drag to pan"
+                fig = _build_map_fig(df_map_viz, color_col, is_discrete, color_map,
+                                     color_scale, title_text, map_view)
+                st.session_state['map_fig'] = (fig_sig, fig)
 
-        fig.update_traces(hovertemplate="<b>%{hovertext}</b><br>Type: %{customdata[2]}<br>Mass: %{customdata[0]:,.0f}g<br>Year: %{customdata[1]}<extra></extra>")
-        fig.update_layout(height=700, margin={"r":0,"t":40,"l":0,"b":0}, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', legend=dict(yanchor="top", y=0.95, xanchor="left", x=0.01, bgcolor="rgba(0,0,0,0.5)"))
-        
-        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False, 'scrollZoom': True})
-        
-        if opt_note: st.warning(opt_note)
-        else: st.caption(controls)
+            # px computes sizeref as 2 * max(size) / size_max**2 — retune it for
+            # the current dot-size slider on the cached figure
+            size_peak = float(df_map_viz['size_safe'].max()) if len(df_map_viz) else 1.0
+            fig.update_traces(marker=dict(sizeref=2.0 * size_peak / (dot_size ** 2)))
 
-        # --- 5. DETAILED CONTEXT CARD (BOTTOM) ---
-        st.markdown("<br>", unsafe_allow_html=True)
+            controls = "🖱️ Drag to rotate • Scroll to zoom" if map_view else "🖱️ Scroll to zoom • Drag to pan"
+
+
+            st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False, 'scrollZoom': True})
         
-        # Styles for the info card
-        st.markdown("""
-        <style>
-        .info-box {
-            background-color: #262730;
-            padding: 20px;
-            border-radius: 10px;
-            border-left: 5px solid #FF4B4B;
-            font-family: sans-serif;
-        }
-        .info-title {
-            font-weight: bold;
-            font-size: 20px;
-            color: #FFFFFF;
-            margin-bottom: 10px;
-        }
-        .info-text {
-            color: #E0E0E0;
-            font-size: 16px;
-            line-height: 1.6;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+            if opt_note: st.warning(opt_note)
+            else: st.caption(controls)
 
-        # Dynamic Content Generation
-        if color_mode == "AI Analysis: Strewn Fields":
-            title = "ℹ️ Identifying Strewn Fields"
-            content = """
-            This analysis uses <b>DBSCAN (Density-Based Spatial Clustering of Applications with Noise)</b>, 
-            a machine learning algorithm, to detect patterns in the crash sites.
-            <br><br>
-            <ul>
-                <li><b>The Logic:</b> When a large meteor hits the atmosphere, it often explodes and fragments, scattering pieces over an elliptical area known as a <i>strewn field</i>.</li>
-                <li><b>The Algorithm:</b> The AI scans the map for clusters of 5 or more meteorites located within a 50km radius of each other.</li>
-                <li><b>The Result:</b> Colored clusters likely represent a single event (a shower of rocks), while grey points are isolated falls.</li>
-            </ul>
-            """
-        elif color_mode == "Mass (Heatmap)":
-            title = "ℹ️ Understanding Mass Distribution"
-            content = """
-            Meteorites vary wildly in size, from dust grains to multi-tonne boulders.
-            <br><br>
-            <ul>
-                <li><b>Logarithmic Scale:</b> We size the dots using a <i>Log Scale</i> because the heaviest meteorite (60,000 kg) is millions of times heavier than the average find. Without this, most points would be invisible!</li>
-                <li><b>Heatmap:</b> <b>Bright Yellow/Orange</b> points represent massive impacts (100kg+), while <b>Dark Purple</b> points represent common, smaller finds.</li>
-            </ul>
-            """
-        elif color_mode == "Composition (Type)":
-            title = "ℹ️ Meteorite Taxonomy (Composition)"
-            content = """
-            Meteorites are classified by what they are made of and where they came from.
-            <br><br>
-            <ul>
-                <li><b style='color:#A8A878'>Stony (Chondrites):</b> The most common type (~86%). These are primitive, unmetamorphosed rocks from the early solar system (4.5 billion years old).</li>
-                <li><b style='color:#C03028'>Stony (Achondrites):</b> Rare rocks from the crust of planets or large asteroids (like Mars, the Moon, or Vesta).</li>
-                <li><b style='color:#B8B8D0'>Iron:</b> Dense metal chunks (Iron-Nickel) from the destroyed cores of ancient proto-planets.</li>
-            </ul>
-            """
-        else: # Discovery
-            title = "ℹ️ Discovery Method - Fell vs. Found"
-            content = """
-            There are two ways science acquires meteorites, and they tell different stories.
-            <br><br>
-            <ul>
-                <li><b style='color:#78C850'>Fell (Observed Falls):</b> These were seen falling from the sky by eyewitnesses and collected shortly after. They are scientifically pristine because they haven't been weathered by Earth's climate.</li>
-                <li><b style='color:#F08030'>Found:</b> These were discovered on the ground (sometimes thousands of years after landing). They are often weathered or rusted. Antarctica is a prime hunting ground for these because dark rocks stand out on white ice.</li>
-            </ul>
-            """
-
-        # Render the card
-        st.markdown(f"""
-        <div class="info-box">
-            <div class="info-title">{title}</div>
-            <div class="info-text">{content}</div>
-        </div>
-        """, unsafe_allow_html=True)
+            # --- 5. DETAILED CONTEXT CARD (BOTTOM) ---
+            st.markdown("<br>", unsafe_allow_html=True)
+        
+            # Styles for the info card
+            st.markdown("""
+            <style>
+            .info-box {
+                background-color: #262730;
+                padding: 20px;
+                border-radius: 10px;
+                border-left: 5px solid #FF4B4B;
+                font-family: sans-serif;
+            }
+            .info-title {
+                font-weight: bold;
+                font-size: 20px;
+                color: #FFFFFF;
+                margin-bottom: 10px;
+            }
+            .info-text {
+                color: #E0E0E0;
+                font-size: 16px;
+                line-height: 1.6;
+            }
+            </style>
+            """, unsafe_allow_html=True)
+
+            # Dynamic Content Generation
+            if color_mode == "AI Analysis: Strewn Fields":
+                title = "ℹ️ Identifying Strewn Fields"
+                content = """
+                This analysis uses <b>DBSCAN (Density-Based Spatial Clustering of Applications with Noise)</b>, 
+                a machine learning algorithm, to detect patterns in the crash sites.
+                <br><br>
+                <ul>
+                    <li><b>The Logic:</b> When a large meteor hits the atmosphere, it often explodes and fragments, scattering pieces over an elliptical area known as a <i>strewn field</i>.</li>
+                    <li><b>The Algorithm:</b> The AI scans the map for clusters of 5 or more meteorites located within a 50km radius of each other.</li>
+                    <li><b>The Result:</b> Colored clusters likely represent a single event (a shower of rocks), while grey points are isolated falls.</li>
+                </ul>
+                """
+            elif color_mode == "Mass (Heatmap)":
+                title = "ℹ️ Understanding Mass Distribution"
+                content = """
+                Meteorites vary wildly in size, from dust grains to multi-tonne boulders.
+                <br><br>
+                <ul>
+                    <li><b>Logarithmic Scale:</b> We size the dots using a <i>Log Scale</i> because the heaviest meteorite (60,000 kg) is millions of times heavier than the average find. Without this, most points would be invisible!</li>
+                    <li><b>Heatmap:</b> <b>Bright Yellow/Orange</b> points represent massive impacts (100kg+), while <b>Dark Purple</b> points represent common, smaller finds.</li>
+                </ul>
+                """
+            elif color_mode == "Composition (Type)":
+                title = "ℹ️ Meteorite Taxonomy (Composition)"
+                content = """
+                Meteorites are classified by what they are made of and where they came from.
+                <br><br>
+                <ul>
+                    <li><b style='color:#A8A878'>Stony (Chondrites):</b> The most common type (~86%). These are primitive, unmetamorphosed rocks from the early solar system (4.5 billion years old).</li>
+                    <li><b style='color:#C03028'>Stony (Achondrites):</b> Rare rocks from the crust of planets or large asteroids (like Mars, the Moon, or Vesta).</li>
+                    <li><b style='color:#B8B8D0'>Iron:</b> Dense metal chunks (Iron-Nickel) from the destroyed cores of ancient proto-planets.</li>
+                </ul>
+                """
+            else: # Discovery
+                title = "ℹ️ Discovery Method - Fell vs. Found"
+                content = """
+                There are two ways science acquires meteorites, and they tell different stories.
+                <br><br>
+                <ul>
+                    <li><b style='color:#78C850'>Fell (Observed Falls):</b> These were seen falling from the sky by eyewitnesses and collected shortly after. They are scientifically pristine because they haven't been weathered by Earth's climate.</li>
+                    <li><b style='color:#F08030'>Found:</b> These were discovered on the ground (sometimes thousands of years after landing). They are often weathered or rusted. Antarctica is a prime hunting ground for these because dark rocks stand out on white ice.</li>
+                </ul>
+                """
+
+            # Render the card
+            st.markdown(f"""
+            <div class="info-box">
+                <div class="info-title">{title}</div>
+                <div class="info-text">{content}</div>
+            </div>
+            """, unsafe_allow_html=True)
+
+
+    render_map(df_filtered)
 
 # ==========================================
 # PAGE 2: DATA SUMMARY (Charts & Data)
@@ -525,7 +674,7 @@ elif page == "Data Summary":
     st.sidebar.header("Data Tools")
     
     # Download Button for the Full Dataset
-    csv_full = df_meteorites.to_csv(index=False).encode('utf-8')
+    csv_full = _csv_bytes(df_meteorites)
     st.sidebar.download_button(
         label="📥 Download Full Dataset",
         data=csv_full,
@@ -542,27 +691,34 @@ elif page == "Data Summary":
     st.divider()
     c_class_chart, c_class_info = st.columns([2, 1])
     
-    with c_class_chart:
-        st.subheader("The Most Common Types")
+    # These charts depend only on the full dataset, which never changes for
+    # the life of the process — build each Figure once and share it across
+    # sessions (cache_resource) instead of re-aggregating per rerun.
+    @st.cache_resource(show_spinner=False)
+    def _class_fig():
         class_counts = df_meteorites['recclass'].value_counts().nlargest(10).reset_index()
         class_counts.columns = ['Classification', 'Count']
-        
+
         fig_class = px.bar(
-            class_counts, 
-            x='Count', y='Classification', 
-            color='Count', 
-            color_continuous_scale='Reds', 
+            class_counts,
+            x='Count', y='Classification',
+            color='Count',
+            color_continuous_scale='Reds',
             orientation='h',
             template="plotly_dark"
         )
         fig_class.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)', 
-            plot_bgcolor='rgba(0,0,0,0)', 
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
             coloraxis_showscale=False,
             yaxis=dict(autorange="reversed"),
             height=400
         )
-        st.plotly_chart(fig_class, use_container_width=True)
+        return fig_class
+
+    with c_class_chart:
+        st.subheader("The Most Common Types")
+        st.plotly_chart(_class_fig(), use_container_width=True)
 
     with c_class_info:
         st.subheader("ℹ️ Taxonomy Guide")
@@ -581,27 +737,31 @@ elif page == "Data Summary":
     st.divider()
     c_fall_chart, c_fall_info = st.columns([1, 2])
     
-    with c_fall_chart:
-        st.subheader("Fell vs. Found")
+    @st.cache_resource(show_spinner=False)
+    def _pie_fig():
         fall_counts = df_meteorites['fall'].value_counts().reset_index()
         fall_counts.columns = ['Status', 'Count']
-        
+
         fig_pie = px.pie(
-            fall_counts, 
-            names='Status', values='Count', 
-            color='Status', 
-            hole=0.4, 
-            color_discrete_map={'Found': "#F9413E", 'Fell': "#A20000"}, 
+            fall_counts,
+            names='Status', values='Count',
+            color='Status',
+            hole=0.4,
+            color_discrete_map={'Found': "#F9413E", 'Fell': "#A20000"},
             template="plotly_dark"
         )
         fig_pie.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)', 
+            paper_bgcolor='rgba(0,0,0,0)',
             plot_bgcolor='rgba(0,0,0,0)',
             showlegend=False,
             margin=dict(t=0, b=0, l=0, r=0)
         )
         fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig_pie, use_container_width=True)
+        return fig_pie
+
+    with c_fall_chart:
+        st.subheader("Fell vs. Found")
+        st.plotly_chart(_pie_fig(), use_container_width=True)
 
     with c_fall_info:
         st.subheader("ℹ️ Why does this distinction matter?")
@@ -615,8 +775,7 @@ elif page == "Data Summary":
         *   **Why it matters:** While still valuable, they are often rusted or weathered. Most Antarctic meteorites are "Finds."
         """)
         
-        fell_percent = (df_meteorites[df_meteorites['fall'] == 'Fell'].shape[0] / df_meteorites.shape[0]) * 100
-        st.warning(f"Only **{fell_percent:.1f}%** of all meteorites in this database were actually seen falling!")
+        st.warning(f"Only **{FELL_PERCENT:.1f}%** of all meteorites in this database were actually seen falling!")
 
     # --- SECTION 3: MASS DISTRIBUTION ---
     st.divider()
@@ -639,42 +798,46 @@ elif page == "Data Summary":
         *   **~10^6 (1000kg):** A Small Car 
         """, unsafe_allow_html=True)
         
-    with c_hist_chart:
+    @st.cache_resource(show_spinner=False)
+    def _mass_fig():
         # Safe Histogram using pre-calc Log Mass
         df_hist = df_meteorites.dropna(subset=['mass_log'])
         fig_mass = px.histogram(
-            df_hist, 
-            x='mass_log', 
-            nbins=50, 
+            df_hist,
+            x='mass_log',
+            nbins=50,
             template="plotly_dark",
             color_discrete_sequence=['#FF4B4B']
         )
         fig_mass.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)', 
+            paper_bgcolor='rgba(0,0,0,0)',
             plot_bgcolor='rgba(0,0,0,0)',
-            xaxis_title="Mass (Logarithmic Scale: 10ˣ grams)", 
+            xaxis_title="Mass (Logarithmic Scale: 10ˣ grams)",
             yaxis_title="Frequency",
             bargap=0.1
         )
         fig_mass.update_traces(hovertemplate="Log Mass: %{x}<br>Count: %{y}<extra></extra>")
-        st.plotly_chart(fig_mass, use_container_width=True)
+        return fig_mass
+
+    with c_hist_chart:
+        st.plotly_chart(_mass_fig(), use_container_width=True)
 
     # --- SECTION 4: THE GIANTS (TOP 100) ---
     st.divider()
     st.header("The Giants: Top 100 Largest Meteorites")
     st.markdown("Detailed list of the heaviest known space rocks.")
 
-    df_top100 = df_meteorites.sort_values('mass (g)', ascending=False).head(100).copy()
-    
-    # Smart Link Generation
-    def generate_url(row):
-        if pd.notna(row['id']) and row['id'] != 0:
-            return f"https://www.lpi.usra.edu/meteor/metbull.php?code={int(row['id'])}"
-        else:
-            safe_name = str(row['name']).replace(' ', '+')
-            return f"https://www.lpi.usra.edu/meteor/metbull.php?sea={safe_name}"
+    df_top100 = df_meteorites.nlargest(100, 'mass (g)').copy()
 
-    df_top100['url'] = df_top100.apply(generate_url, axis=1)
+    # Smart Link Generation — vectorized over the columns instead of a
+    # Python-level apply per row
+    ids = df_top100['id'].fillna(0).astype('int64')
+    names_safe = df_top100['name'].astype(str).str.replace(' ', '+', regex=False)
+    df_top100['url'] = np.where(
+        ids != 0,
+        'https://www.lpi.usra.edu/meteor/metbull.php?code=' + ids.astype(str),
+        'https://www.lpi.usra.edu/meteor/metbull.php?sea=' + names_safe
+    )
 
     st.dataframe(
         df_top100[['name', 'recclass', 'mass (g)', 'year_int', 'fall', 'url']],
@@ -716,11 +879,18 @@ elif page == "Live Fireballs":
     # Data Export
     st.sidebar.header("Data Tools")
     
-    @st.cache_data(ttl=86400)
+    # persist="disk" keeps the cleaned frame across process restarts, so a
+    # cold start within the TTL skips the download + cleaning entirely
+    @st.cache_data(ttl=86400, persist="disk", show_spinner=False)
     def get_fireball_data():
         url = "https://ssd-api.jpl.nasa.gov/fireball.api"
+        # Retry transient 5xx with backoff rather than erroring the page
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        ))
         try:
-            response = requests.get(url, timeout=10)
+            response = session.get(url, timeout=(5, 30))
             response.raise_for_status()
             data = response.json()
             
@@ -730,22 +900,34 @@ elif page == "Live Fireballs":
             df = pd.DataFrame(rows, columns=cols)
             
             # Cleaning
+            # One block-wise pass converts AND downcasts every numeric
+            # column together — float32 is plenty for plotting and halves
+            # the cached frame and every Plotly payload / CSV built from it
             numeric_cols = ['lat', 'lon', 'vel', 'energy', 'impact-e', 'alt']
-            for c in numeric_cols:
-                if c in df.columns:
-                    df[c] = pd.to_numeric(df[c], errors='coerce')
+            present = [c for c in numeric_cols if c in df.columns]
+            df[present] = df[present].apply(pd.to_numeric, errors='coerce', downcast='float')
 
-            df['date'] = pd.to_datetime(df['date'])
+            # The API returns consistent 'YYYY-MM-DD HH:MM:SS' strings — the
+            # ISO8601 hint keeps pandas on the C parse path instead of
+            # per-value format inference
+            df['date'] = pd.to_datetime(df['date'], format='ISO8601', errors='coerce')
             df['year'] = df['date'].dt.year
 
+            # One np.where pass per axis on the raw arrays — no mask build +
+            # scatter-write, and no chained-assignment trouble under
+            # copy-on-write
             if 'lat-dir' in df.columns:
-                df.loc[df['lat-dir'] == 'S', 'lat'] *= -1
+                df['lat'] = np.where(df['lat-dir'].values == 'S', -df['lat'].values, df['lat'].values)
             if 'lon-dir' in df.columns:
-                df.loc[df['lon-dir'] == 'W', 'lon'] *= -1
-            
-            df['impact-e'] = df['impact-e'].fillna(0)
-            df['size_scale'] = (np.log10(df['impact-e'] + 1) * 10) + 2
+                df['lon'] = np.where(df['lon-dir'].values == 'W', -df['lon'].values, df['lon'].values)
             
+            # Fused on a raw float32 ndarray: one pass for the fill, log10
+            # and affine scale, no intermediate Series allocations
+            e = df['impact-e'].fillna(0).to_numpy(dtype=np.float32)
+            df['impact-e'] = e
+            df['size_scale'] = np.log10(e + 1.0) * 10.0 + 2.0
+            df['year'] = pd.to_numeric(df['year'], downcast='integer')
+
             return df
             
         except Exception as e:
@@ -755,7 +937,8 @@ elif page == "Live Fireballs":
     df_fireball = get_fireball_data()
 
     if not df_fireball.empty:
-        csv_fb = df_fireball.to_csv(index=False).encode('utf-8')
+        # cached — only re-encodes when the daily fetch actually refreshes
+        csv_fb = _csv_bytes(df_fireball)
         st.sidebar.download_button(
             label="📥 Download Fireball Data",
             data=csv_fb,
@@ -802,51 +985,59 @@ elif page == "Live Fireballs":
         st.markdown("<br>", unsafe_allow_html=True)
 
         # --- MAP PLOTTING ---
-        plot_args = dict(
-            data_frame=df_fireball,
-            lat='lat', lon='lon',
-            size='size_scale',
-            hover_data={
-                'date': True, 'impact-e': ':.2f', 'vel': ':.1f', 'alt': ':.1f',
-                'size_scale': False, 'year': False, 'lat': False, 'lon': False
-            },
-            title="Global Fireball Map",
-            template="plotly_dark",
-            opacity=0.8,
-            projection="orthographic"
-        )
+        # Built once per (data refresh, color mode) — toggling between
+        # already-seen modes returns the cached Figure instead of
+        # reconstructing traces and hover layout from scratch
+        @st.cache_data(ttl=86400, show_spinner=False)
+        def build_fireball_fig(df, color_mode):
+            plot_args = dict(
+                data_frame=df,
+                lat='lat', lon='lon',
+                size='size_scale',
+                hover_data={
+                    'date': True, 'impact-e': ':.2f', 'vel': ':.1f', 'alt': ':.1f',
+                    'size_scale': False, 'year': False, 'lat': False, 'lon': False
+                },
+                title="Global Fireball Map",
+                template="plotly_dark",
+                opacity=0.8,
+                projection="orthographic"
+            )
 
-        if color_mode == "Impact Energy (Heatmap)":
-            fig_fb = px.scatter_geo(**plot_args, color='impact-e', color_continuous_scale="Magma")
-            fig_fb.update_layout(coloraxis_colorbar_title="Energy (kt)")
-            
-        elif color_mode == "Year (Timeline)":
-            fig_fb = px.scatter_geo(**plot_args, color='year', color_continuous_scale="Viridis")
-            fig_fb.update_layout(coloraxis_colorbar_title="Year")
-            
-        else:
-            fig_fb = px.scatter_geo(**plot_args, color_discrete_sequence=["#FFA500"])
-
-        fig_fb.update_traces(
-            hovertemplate="""
-            <b>%{customdata[0]|%Y-%m-%d}</b><br>
-            Energy: %{customdata[1]} kt<br>
-            Velocity: %{customdata[2]} km/s<br>
-            Altitude: %{customdata[3]} km
-            <extra></extra>
-            """
-        )
+            if color_mode == "Impact Energy (Heatmap)":
+                fig_fb = px.scatter_geo(**plot_args, color='impact-e', color_continuous_scale="Magma")
+                fig_fb.update_layout(coloraxis_colorbar_title="Energy (kt)")
 
-        fig_fb.update_geos(
-            bgcolor='rgba(0,0,0,0)', showocean=True, oceancolor="#111111",
-            showland=True, landcolor="#262626", showcountries=True, countrycolor="#444444"
-        )
-        
-        fig_fb.update_layout(
-            margin={"r":0,"t":30,"l":0,"b":0},
-            coloraxis_colorbar=dict(len=0.5, yanchor="middle", y=0.5),
-            height=600
-        )
+            elif color_mode == "Year (Timeline)":
+                fig_fb = px.scatter_geo(**plot_args, color='year', color_continuous_scale="Viridis")
+                fig_fb.update_layout(coloraxis_colorbar_title="Year")
+
+            else:
+                fig_fb = px.scatter_geo(**plot_args, color_discrete_sequence=["#FFA500"])
+
+            fig_fb.update_traces(
+                hovertemplate="""
+                <b>%{customdata[0]|%Y-%m-%d}</b><br>
+                Energy: %{customdata[1]} kt<br>
+                Velocity: %{customdata[2]} km/s<br>
+                Altitude: %{customdata[3]} km
+                <extra></extra>
+                """
+            )
+
+            fig_fb.update_geos(
+                bgcolor='rgba(0,0,0,0)', showocean=True, oceancolor="#111111",
+                showland=True, landcolor="#262626", showcountries=True, countrycolor="#444444"
+            )
+
+            fig_fb.update_layout(
+                margin={"r":0,"t":30,"l":0,"b":0},
+                coloraxis_colorbar=dict(len=0.5, yanchor="middle", y=0.5),
+                height=600
+            )
+            return fig_fb
+
+        fig_fb = build_fireball_fig(df_fireball, color_mode)
 
         st.plotly_chart(fig_fb, use_container_width=True)
         
@@ -872,14 +1063,21 @@ elif page == "Live Fireballs":
         with tab2:
             st.caption("Do powerful meteors penetrate deeper into the atmosphere?")
             df_phys = df_fireball.dropna(subset=['alt', 'impact-e'])
-            fig_phys = px.scatter(
-                df_phys, x="impact-e", y="alt", size="size_scale", color="vel",
-                hover_data=['date'], log_x=True, title="Explosion Altitude vs. Impact Energy",
-                template="plotly_dark", color_continuous_scale="Tealgrn"
-            )
+            # WebGL trace: one GPU draw call instead of an SVG node per point,
+            # so the tab stays snappy as the feed grows
+            fig_phys = go.Figure(go.Scattergl(
+                x=df_phys['impact-e'], y=df_phys['alt'], mode='markers',
+                marker=dict(size=df_phys['size_scale'], color=df_phys['vel'],
+                            colorscale='Tealgrn', showscale=True,
+                            colorbar=dict(title="Speed (km/s)")),
+                customdata=df_phys['date'],
+                hovertemplate="%{customdata|%Y-%m-%d}<br>Energy: %{x:.2f} kt<br>Altitude: %{y:.1f} km<extra></extra>"
+            ))
+            fig_phys.update_xaxes(type='log')
             fig_phys.update_layout(
+                template="plotly_dark", title="Explosion Altitude vs. Impact Energy",
                 xaxis_title="Impact Energy (kt) - Log Scale", yaxis_title="Altitude (km)",
-                coloraxis_colorbar_title="Speed (km/s)", paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
+                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
             )
             st.plotly_chart(fig_phys, use_container_width=True)
 
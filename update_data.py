@@ -4,11 +4,86 @@ import io
 import numpy as np
 import urllib3
 import re
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from lxml import html as lh
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 # Suppress SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Compiled once — reused for the vectorized mass / coordinate extraction passes
+NUM_RE = re.compile(r"(\d*\.?\d+)")
+COORD_RE = re.compile(r"([\d.]+)\s*([NS])[,\s]+([\d.]+)\s*([EW])")
+
+# Explicit dtypes for the historical base: skips pandas' whole-file type
+# inference and only parses the columns the final dataset actually keeps
+BASE_DTYPES = {
+    'name': 'string', 'id': 'float64', 'recclass': 'category',
+    'mass (g)': 'float32', 'fall': 'category', 'year': 'float32',
+    'reclat': 'float32', 'reclong': 'float32',
+    'year_int': 'int32', 'mass_log': 'float32',
+}
+
+@lru_cache(maxsize=64)
+def _build_col_map(cols_tuple):
+    """Builds the raw-header -> canonical-name rename map (keyword based)."""
+    col_map = {}
+    for raw in cols_tuple:
+        col = raw.lower().strip()
+        if 'name' in col and 'type' not in col: col_map[raw] = 'name'
+        elif 'class' in col or 'type' in col: col_map[raw] = 'recclass'
+        elif 'mass' in col: col_map[raw] = 'mass (g)'
+        elif 'year' in col or 'date' in col: col_map[raw] = 'year'
+        elif 'fall' in col: col_map[raw] = 'fall'
+        elif 'co-ord' in col or 'loc' in col: col_map[raw] = 'GeoLocation'
+        elif col != raw: col_map[raw] = col  # unmatched columns still get normalized
+    return col_map
+
+def _scrape_page(session, base_url, page, records_per_page, throttle):
+    """Fetches and parses one bulletin page; returns a renamed DataFrame or None."""
+    # Politeness throttle shared by all workers, while the network waits
+    # themselves still overlap across threads
+    with throttle:
+        time.sleep(0.25)
+
+    params = {
+        'sea': '*',
+        'sfor': 'names',
+        'srt': 'year',
+        'dir': 'desc',
+        'lrec': str(records_per_page),
+        'page': str(page),
+        'pnt': 'Normal table',
+        'map': 'ge'
+    }
+    # (connect, read) timeout tuple: a slow connect fails fast
+    response = session.get(base_url, params=params, timeout=(5, 30), verify=False)
+
+    # 1. Parse Table: Look for "Mass" to find the data table.
+    # One lxml parse + XPath pinpoints the data table, so read_html only
+    # has to convert that single table instead of walking every <table>
+    # on the page (the bulletin pages carry several layout tables).
+    doc = lh.fromstring(response.content)
+    tables = doc.xpath("//table[.//th[contains(., 'Mass')] or .//td[contains(., 'Mass')]]")
+    if not tables:
+        return None
+
+    try:
+        df_chunk = pd.read_html(io.BytesIO(lh.tostring(tables[0])), flavor='lxml')[0]
+    except ValueError:
+        return None
+
+    # 2. DYNAMIC COLUMN RENAMING (The Fix)
+    # Every page shares the same header, so the keyword matching runs once
+    # and subsequent pages hit the lru_cache on the raw column tuple
+    df_chunk.columns = df_chunk.columns.astype(str)
+    return df_chunk.rename(columns=_build_col_map(tuple(df_chunk.columns)))
+
 def get_latest_meteorites():
     print("🚀 Connecting to Meteoritical Bulletin Database...")
     print("   Strategy: Paginating 500 records/page (Newest -> Oldest).")
@@ -18,85 +93,73 @@ def get_latest_meteorites():
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
 
+    # Keep-alive session: TCP + TLS handshakes are reused across all pages,
+    # and transient 5xx responses get retried with backoff instead of dying
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=2, pool_maxsize=4,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+    ))
+    session.headers.update(headers)
+
     all_dfs = []
     page = 0
     records_per_page = 500
     target_stop_year = 2012
     keep_scraping = True
+    throttle = threading.Lock()
+
+    # Speculative batches of 4: the pages of a batch are fetched in
+    # parallel through the pooled session, results are inspected in page
+    # order, and the year stop-logic runs per page — so at most one batch
+    # of pages is fetched past the stop year.
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        while keep_scraping:
+            batch = list(range(page, page + 4))
+            print(f"   ... Scraping Pages {batch[0]}-{batch[-1]}...")
+            futures = [executor.submit(_scrape_page, session, base_url, p, records_per_page, throttle)
+                       for p in batch]
 
-    while keep_scraping:
-        print(f"   ... Scraping Page {page}...", end=" ")
-        
-        params = {
-            'sea': '*',           
-            'sfor': 'names',      
-            'srt': 'year',        
-            'dir': 'desc',        
-            'lrec': str(records_per_page),
-            'page': str(page),    
-            'pnt': 'Normal table',
-            'map': 'ge'           
-        }
-
-        try:
-            response = requests.get(base_url, params=params, headers=headers, timeout=45, verify=False)
-            
-            # 1. Parse Table: Look for "Mass" to find the data table
-            try:
-                tables = pd.read_html(io.StringIO(response.text), match="Mass")
-            except ValueError:
-                print("❌ No table found (End of data?).")
-                break
-            
-            df_chunk = tables[0]
-            
-            # 2. DYNAMIC COLUMN RENAMING (The Fix)
-            # Normalize all columns to lowercase and strip whitespace
-            df_chunk.columns = df_chunk.columns.astype(str).str.lower().str.strip()
-            
-            # Map based on keywords
-            col_map = {}
-            for col in df_chunk.columns:
-                if 'name' in col and 'type' not in col: col_map[col] = 'name'
-                elif 'class' in col or 'type' in col: col_map[col] = 'recclass'
-                elif 'mass' in col: col_map[col] = 'mass (g)'
-                elif 'year' in col or 'date' in col: col_map[col] = 'year'
-                elif 'fall' in col: col_map[col] = 'fall'
-                elif 'co-ord' in col or 'loc' in col: col_map[col] = 'GeoLocation'
-            
-            df_chunk = df_chunk.rename(columns=col_map)
-            
-            # Check if critical columns exist
-            if 'year' not in df_chunk.columns:
-                print(f"⚠️ 'Year' column missing. Columns found: {df_chunk.columns.tolist()}")
-                # Skip this chunk if unusable
-                page += 1
-                continue
-
-            # 3. Check Years
-            df_chunk['temp_year'] = pd.to_numeric(df_chunk['year'], errors='coerce').fillna(0)
-            
-            min_year = df_chunk['temp_year'].min()
-            max_year = df_chunk['temp_year'].max()
-            count = len(df_chunk)
-            
-            print(f"✅ Got {count} rows (Years: {int(min_year)} - {int(max_year)})")
-            
-            all_dfs.append(df_chunk)
-
-            # STOP LOGIC
-            if count == 0:
-                keep_scraping = False
-            elif max_year < target_stop_year and max_year > 0:
-                print(f"   🛑 Reached historical data ({int(max_year)} < {target_stop_year}). Stopping.")
-                keep_scraping = False
-            
-            page += 1
-            time.sleep(1) 
-
-        except Exception as e:
-            print(f"❌ Error on page {page}: {e}")
-            break
+            for p, future in zip(batch, futures):
+                try:
+                    df_chunk = future.result()
+                except Exception as e:
+                    print(f"   ❌ Error on page {p}: {e}")
+                    keep_scraping = False
+                    break
+
+                if df_chunk is None:
+                    print(f"   ❌ Page {p}: no table found (End of data?).")
+                    keep_scraping = False
+                    break
+
+                # Check if critical columns exist
+                if 'year' not in df_chunk.columns:
+                    print(f"   ⚠️ Page {p}: 'Year' column missing. Columns found: {df_chunk.columns.tolist()}")
+                    # Skip this chunk if unusable
+                    continue
+
+                # 3. Check Years
+                df_chunk['temp_year'] = pd.to_numeric(df_chunk['year'], errors='coerce').fillna(0)
+
+                min_year = df_chunk['temp_year'].min()
+                max_year = df_chunk['temp_year'].max()
+                count = len(df_chunk)
+
+                print(f"   ✅ Page {p}: {count} rows (Years: {int(min_year)} - {int(max_year)})")
+
+                all_dfs.append(df_chunk)
+
+                # STOP LOGIC
+                if count == 0:
+                    keep_scraping = False
+                    break
+                elif max_year < target_stop_year and max_year > 0:
+                    print(f"   🛑 Reached historical data ({int(max_year)} < {target_stop_year}). Stopping.")
+                    keep_scraping = False
+                    break
+
+            page += 4
 
     # --- PROCESS ---
     if not all_dfs:
@@ -106,66 +169,66 @@ def get_latest_meteorites():
     print("🔄 Processing collected data...")
     df_new = pd.concat(all_dfs, ignore_index=True)
 
+    # 0. Year Filter FIRST: the scraper overshoots the stop year by up to a
+    # batch, so dropping pre-2013 rows now means every cleaning pass below
+    # only touches rows that make it into the output. temp_year was already
+    # computed per page during the scrape — reuse it instead of re-parsing.
+    df_new['year_int'] = df_new['temp_year'].astype(int)
+    df_new = df_new[df_new['year_int'] > 2012].reset_index(drop=True)
+    df_new = df_new.drop(columns='temp_year')
+
     # 1. Coordinate Handling
     if 'GeoLocation' not in df_new.columns:
         df_new['GeoLocation'] = np.nan
 
     # 2. Mass Cleaning
-    def clean_mass(val):
-        if pd.isna(val) or val == '': return 0
-        val_str = str(val).lower().replace(',', '').strip()
-        match = re.search(r"(\d*\.?\d+)", val_str)
-        if match:
-            number = float(match.group(1))
-            if 'kg' in val_str: return number * 1000
-            if 'mg' in val_str: return number / 1000
-            if 'ton' in val_str: return number * 1000000
-            return number
-        return 0
-
-    df_new['mass (g)'] = df_new['mass (g)'].apply(clean_mass)
+    # Vectorized: one str.extract pulls the number, three contains masks
+    # pick the unit scale — all C-level passes instead of a Python function
+    # (with its own regex search) per row
+    s = df_new['mass (g)'].astype(str).str.lower().str.replace(',', '', regex=False)
+    num = pd.to_numeric(s.str.extract(NUM_RE, expand=False), errors='coerce').fillna(0)
+    kg = s.str.contains('kg', na=False)
+    mg = s.str.contains('mg', na=False)
+    ton = s.str.contains('ton', na=False)
+    df_new['mass (g)'] = np.where(ton, num * 1e6, np.where(kg, num * 1000, np.where(mg, num / 1000, num)))
     df_new = df_new[df_new['mass (g)'] > 0]
     df_new['mass_log'] = np.log10(df_new['mass (g)'])
 
-    # 3. Clean Year & Filter
-    df_new['year_int'] = pd.to_numeric(df_new['year'], errors='coerce').fillna(0).astype(int)
-    # Strict filter
-    df_new = df_new[df_new['year_int'] > 2012]
-
     # 4. Categories
-    def get_category(c):
-        c = str(c).lower()
-        if 'iron' in c or 'mesosiderite' in c or 'pallasite' in c: return 'Iron / Stony-Iron'
-        elif 'chondrite' in c: return 'Stony (Chondrite)'
-        elif 'achondrite' in c or 'martian' in c or 'lunar' in c: return 'Stony (Achondrite)'
-        else: return 'Other / Unknown'
-
+    # Vectorized: one contains pass per group in C, combined with
+    # np.select. Order matters (iron/pallasite first) to keep the old
+    # if/elif chain semantics.
     if 'recclass' in df_new.columns:
-        df_new['category_broad'] = df_new['recclass'].apply(get_category)
+        c = df_new['recclass'].astype(str).str.lower()
+        conds = [
+            c.str.contains('iron|mesosiderite|pallasite', regex=True, na=False),
+            c.str.contains('chondrite', na=False),
+            c.str.contains('achondrite|martian|lunar', regex=True, na=False),
+        ]
+        choices = ['Iron / Stony-Iron', 'Stony (Chondrite)', 'Stony (Achondrite)']
+        df_new['category_broad'] = np.select(conds, choices, default='Other / Unknown')
     else:
         df_new['category_broad'] = "Unknown"
 
     # 5. Parse Coordinates
-    def parse_coord(coord_str, idx):
-        if pd.isna(coord_str): return np.nan
-        parts = str(coord_str).split()
-        if len(parts) < 2: return np.nan
-        try:
-            val = parts[idx]
-            num = float(re.findall(r"[\d\.]+", val)[0])
-            direction = val[-1]
-            if idx == 0 and direction == 'S': num *= -1
-            if idx == 1 and direction == 'W': num *= -1
-            return num
-        except:
-            return np.nan
-
-    df_new['reclat'] = df_new['GeoLocation'].apply(lambda x: parse_coord(x, 0))
-    df_new['reclong'] = df_new['GeoLocation'].apply(lambda x: parse_coord(x, 1))
+    # One vectorized extract captures both values and their direction
+    # letters; malformed cells fall out as NaN via to_numeric(coerce).
+    # Replaces two per-row apply passes (each doing split + findall).
+    ext = df_new['GeoLocation'].astype(str).str.extract(COORD_RE)
+    lat = pd.to_numeric(ext[0], errors='coerce')
+    lon = pd.to_numeric(ext[2], errors='coerce')
+    df_new['reclat'] = np.where(ext[1].eq('S'), -lat, lat)
+    df_new['reclong'] = np.where(ext[3].eq('W'), -lon, lon)
+
+    # Downcast before the merge so the concat/dedup below move half the bytes
+    df_new['year_int'] = pd.to_numeric(df_new['year_int'], downcast='integer')
+    for col in ['mass (g)', 'mass_log', 'reclat', 'reclong']:
+        df_new[col] = pd.to_numeric(df_new[col], downcast='float')
 
     # --- MERGE ---
     try:
-        df_base = pd.read_csv("Meteorite_Landings_Cleaned.csv")
+        df_base = pd.read_csv("Meteorite_Landings_Cleaned.csv",
+                              usecols=list(BASE_DTYPES), dtype=BASE_DTYPES)
         print(f"📚 Loaded Historical Base: {len(df_base)} records.")
     except:
         print("⚠️ Base file not found. Creating new database.")
@@ -174,12 +237,21 @@ def get_latest_meteorites():
     df_final = pd.concat([df_base, df_new], ignore_index=True)
     
     # Deduplicate (Priority: Base dataset often has better coordinates)
-    # We sort so that entries with valid lat/lon come first
-    df_final = df_final.sort_values(by=['name', 'reclat'], na_position='last')
-    df_final = df_final.drop_duplicates(subset=['name'], keep='first')
+    # Stable sort on a tiny int8 flag floats coordinate-bearing rows to the
+    # front (base rows stay ahead of scraped ones within each group), then
+    # drop_duplicates keeps the first row per name. Much cheaper than the
+    # old two-key sort over name + float.
+    df_final['_has_coord'] = df_final['reclat'].notna().astype('int8')
+    df_final = (df_final.sort_values('_has_coord', ascending=False, kind='stable')
+                        .drop_duplicates(subset=['name'], keep='first')
+                        .drop(columns='_has_coord'))
 
     output_file = "Meteorite_Landings_Updated.csv"
-    df_final.to_csv(output_file, index=False)
+    # Parquet is the primary artifact (typed, zstd, ~10x faster to re-read);
+    # CSV kept for compatibility, streamed in chunks so the writer never
+    # materializes the whole file as one string
+    df_final.to_parquet(output_file.replace('.csv', '.parquet'), compression='zstd', index=False)
+    df_final.to_csv(output_file, index=False, chunksize=50_000)
     
     print(f"🎉 Success! Database updated.")
     print(f"   - Total Count: {len(df_final)}")